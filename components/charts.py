@@ -13,11 +13,8 @@ def plot_portfolio_performance():
         'MSFT': 8
     }
     
-    # Get historical data for each stock
-    historical_data = {}
-    for symbol in portfolio:
-        data = StockService.get_stock_data(symbol)
-        historical_data[symbol] = data
+    # Get historical data for all stocks in one request
+    historical_data = StockService.get_stocks_data(list(portfolio))
     
     # Create performance chart
     fig = go.Figure()
@@ -1,45 +1,19 @@
 import streamlit as st
 import pandas as pd
-import os
-import singlestoredb as s2
+from database.repository import get_portfolio_repository
 from services.stock_service import StockService
 from utils.data_utils import format_currency, format_percentage, calculate_portfolio_metrics
 
 
 def get_optimized_positions():
     """Fetch optimized portfolio positions from SingleStore."""
-    config = {
-        "host": os.getenv('host'),
-        "port": os.getenv('port'),
-        "user": os.getenv('user'),
-        "password": os.getenv('password'),
-        "database": os.getenv('database')
-    }
-    connection = s2.connect(**config)
-    cursor = connection.cursor()
-
     # Get user_id from session state
     user_id = st.session_state.get('user_id', '')
     
     if not user_id:
-        cursor.close()
-        connection.close()
         return {}
 
-    query = "SELECT symbol, quantity FROM optimized_portfolio WHERE user_id = %s"
-    cursor.execute(query, (user_id,))
-    results = cursor.fetchall()
-    cursor.close()
-    connection.close()
-
-    positions = {}
-    for row in results:
-        # Assuming each row is a tuple (symbol, quantity)
-        symbol = row[0]
-        quantity = row[1]
-        # If multiple rows for the same symbol exist, sum them
-        positions[symbol] = positions.get(symbol, 0) + quantity
-    return positions
+    return get_portfolio_repository().get_positions(user_id)
 
 
 def display_portfolio_summary():
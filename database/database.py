@@ -1,18 +1,181 @@
 # database/database.py
+import os
+import threading
+from contextlib import contextmanager
 import singlestoredb as s2
 from tradeSimulator.config import Config
-from database.models import CREATE_LIVE_TRADES_TABLE
+from tradeSimulator.db_pool import ConnectionPool
+from tradeSimulator.utils import TRADE_COLUMNS
+from database.models import (
+    CREATE_LIVE_TRADES_COLUMNSTORE, CREATE_LIVE_TRADES_TABLE, CREATE_OPTIMIZED_PORTFOLIO_KEYED,
+    CREATE_OPTIMIZED_PORTFOLIO_TABLE,
+    CREATE_SCHEMA_MIGRATIONS_TABLE, CREATE_TRADE_BARS_TABLE, CREATE_USER_ACTIVITIES_TABLE,
+)
 
-def init_db():
-    # Replace protocol if needed
-    db_url = Config.get_singlestore_db_url()
-    conn = s2.connect(db_url)
+_initialized = False
+_init_lock = threading.Lock()
+_pool = None
+_pool_lock = threading.Lock()
+
+def table_exists(cur, table):
+    cur.execute("SHOW TABLES LIKE %s", (table,))
+    return bool(cur.fetchall())
+
+def create_live_trades(cur):
+    cur.execute(CREATE_LIVE_TRADES_TABLE)
+
+def keep_or_drop_legacy(cur, table):
+    """Drop {table}_legacy if table holds at least as many rows, otherwise keep it and say so."""
+    if not table_exists(cur, f"{table}_legacy"):
+        return
+    cur.execute(f"SELECT COUNT(*) FROM {table}_legacy")
+    legacy = cur.fetchall()[0][0]
+    cur.execute(f"SELECT COUNT(*) FROM {table}")
+    copied = cur.fetchall()[0][0]
+    if copied >= legacy:
+        cur.execute(f"DROP TABLE {table}_legacy")
+    else:
+        print(f"Copied {copied} of {legacy} rows into {table}; keeping the originals in {table}_legacy.")
+
+def migrate_live_trades_to_columnstore(cur):
+    """
+    Rebuild live_trades with the columnstore definition, copying the existing rows.
+
+    The old simulator re-sent sampled rows with the same id, so legacy (ticker, id)
+    pairs repeat; every repeat after the first gets its trade_id appended to its id to
+    satisfy the new unique key. The old table is dropped only if every row was copied,
+    otherwise it is kept as live_trades_legacy. Each step checks the current state, so
+    a migration interrupted half way can simply be run again.
+    """
+    finished = table_exists(cur, "live_trades") and not table_exists(cur, "live_trades_new")
+    if finished and table_exists(cur, "live_trades_legacy"):
+        # interrupted after the final rename: only the legacy check is left
+        keep_or_drop_legacy(cur, "live_trades")
+        return
+    cur.execute(CREATE_LIVE_TRADES_COLUMNSTORE.format(table="live_trades_new"))
+    if table_exists(cur, "live_trades"):
+        columns = ", ".join(TRADE_COLUMNS)
+        select = ", ".join(
+            "CASE WHEN id IS NULL THEN CONCAT('legacy-', trade_id) "
+            "WHEN trade_id = MIN(trade_id) OVER (PARTITION BY ticker, id) THEN id "
+            "ELSE CONCAT(id, '-', trade_id) END" if column == "id" else column
+            for column in TRADE_COLUMNS
+        )
+        # trade_id is regenerated; IGNORE only skips rows already copied by an interrupted run
+        cur.execute(f"INSERT IGNORE INTO live_trades_new ({columns}) SELECT {select} FROM live_trades")
+        cur.execute("ALTER TABLE live_trades RENAME live_trades_legacy")
+    cur.execute("ALTER TABLE live_trades_new RENAME live_trades")
+    keep_or_drop_legacy(cur, "live_trades")
+
+def create_trade_bars(cur):
+    cur.execute(CREATE_TRADE_BARS_TABLE)
+
+def create_optimized_portfolio(cur):
+    cur.execute(CREATE_OPTIMIZED_PORTFOLIO_TABLE)
+
+def create_user_activities(cur):
+    cur.execute(CREATE_USER_ACTIVITIES_TABLE)
+
+def migrate_optimized_portfolio_to_keyed(cur):
+    """
+    Rebuild optimized_portfolio with one row per (user_id, symbol).
+
+    Duplicate holdings are summed, as get_optimized_positions did when reading them.
+    REPLACE makes the copy safe to repeat if the migration is interrupted.
+    """
+    cur.execute(CREATE_OPTIMIZED_PORTFOLIO_KEYED.format(table="optimized_portfolio_new"))
+    if table_exists(cur, "optimized_portfolio"):
+        cur.execute(
+            "REPLACE INTO optimized_portfolio_new (user_id, symbol, quantity, target_allocation, created_at) "
+            "SELECT user_id, symbol, SUM(quantity), SUM(target_allocation), MAX(created_at) "
+            "FROM optimized_portfolio WHERE user_id IS NOT NULL AND symbol IS NOT NULL GROUP BY user_id, symbol"
+        )
+        cur.execute("ALTER TABLE optimized_portfolio RENAME optimized_portfolio_legacy")
+    cur.execute("ALTER TABLE optimized_portfolio_new RENAME optimized_portfolio")
+    cur.execute("DROP TABLE IF EXISTS optimized_portfolio_legacy")
+
+# (version, description, migration) in the order they are applied; never edit or
+# reorder released entries, append new ones instead
+MIGRATIONS = [
+    (1, "create live_trades", create_live_trades),
+    (2, "live_trades as a columnstore sharded and sorted by ticker", migrate_live_trades_to_columnstore),
+    (3, "one-second OHLCV rollup trade_bars_1s", create_trade_bars),
+    (4, "create optimized_portfolio", create_optimized_portfolio),
+    (5, "create user_activities", create_user_activities),
+    (6, "optimized_portfolio keyed by (user_id, symbol)", migrate_optimized_portfolio_to_keyed),
+]
+
+def applied_versions(cur):
+    cur.execute(CREATE_SCHEMA_MIGRATIONS_TABLE)
+    cur.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cur.fetchall()}
+
+def migrate(conn):
+    """Apply the MIGRATIONS not yet recorded in schema_migrations, in order."""
     cur = conn.cursor()
     try:
-        cur.execute(CREATE_LIVE_TRADES_TABLE)
-        conn.commit()
-    except Exception as e:
-        print(f"Error initializing database: {e}")
+        done = applied_versions(cur)
+        for version, description, migration in MIGRATIONS:
+            if version in done:
+                continue
+            print(f"Applying schema migration {version}: {description}")
+            migration(cur)
+            cur.execute(
+                "INSERT INTO schema_migrations (version, description, applied_at) VALUES (%s, %s, NOW(6))",
+                (version, description),
+            )
+            conn.commit()
     finally:
         cur.close()
-        conn.close()
+
+def connect():
+    """New connection from SINGLESTORE_DB_URL, or the host/port/user/password/database variables."""
+    db_url = Config.get_singlestore_db_url()
+    if db_url:
+        return s2.connect(db_url.replace("mysql+pymysql", "mysql"))
+    return s2.connect(
+        host=os.getenv('host'),
+        port=os.getenv('port'),
+        user=os.getenv('user'),
+        password=os.getenv('password'),
+        database=os.getenv('database'),
+    )
+
+def get_pool():
+    """The app-wide connection pool, created on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # connection-level failures retire the connection; other errors only roll back
+            _pool = ConnectionPool(
+                connect, max_size=Config.get_db_pool_size(), recycle_on=(s2.OperationalError, s2.InterfaceError)
+            )
+        return _pool
+
+def init_db():
+    # Runs the pending migrations once per process; later calls return immediately
+    global _initialized
+    if _initialized:
+        return
+    with _init_lock:
+        if _initialized:
+            return
+        try:
+            with get_pool().connection() as conn:
+                migrate(conn)
+            _initialized = True
+        except Exception as e:
+            print(f"Error initializing database: {e}")
+
+@contextmanager
+def db_connection():
+    """
+    Borrow a pooled connection, initializing the schema on first use.
+
+    Commits when the block exits normally; on an exception the pool rolls back, or
+    closes the connection if the error was a lost connection.
+    """
+    init_db()
+    with get_pool().connection() as conn:
+        yield conn
+        conn.commit()
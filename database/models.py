@@ -1,5 +1,6 @@
 # database/models.py
 
+# Original rowstore definition, kept as schema version 1 for existing deployments.
 CREATE_LIVE_TRADES_TABLE = """
 CREATE TABLE IF NOT EXISTS live_trades (
     trade_id INT AUTO_INCREMENT PRIMARY KEY,
@@ -20,3 +21,99 @@ CREATE TABLE IF NOT EXISTS live_trades (
     trf_timestamp BIGINT
 );
 """
+
+# Columnstore definition (schema version 2). Rows are sharded by ticker and sorted by
+# (ticker, participant_timestamp), so per-ticker and time-range reads skip most
+# segments. The unique key makes re-sent trades detectable (INSERT IGNORE); SingleStore
+# requires unique keys to contain the shard key.
+CREATE_LIVE_TRADES_COLUMNSTORE = """
+CREATE TABLE IF NOT EXISTS {table} (
+    trade_id BIGINT AUTO_INCREMENT,
+    localTS DATETIME(6),
+    localDate DATE,
+    ticker VARCHAR(10) NOT NULL,
+    conditions VARCHAR(50),
+    correction SMALLINT,
+    exchange SMALLINT,
+    id VARCHAR(50) NOT NULL,
+    participant_timestamp BIGINT,
+    price DECIMAL(18, 6),
+    sequence_number BIGINT,
+    sip_timestamp BIGINT,
+    size INT,
+    tape SMALLINT,
+    trf_id INT,
+    trf_timestamp BIGINT,
+    SORT KEY (ticker, participant_timestamp),
+    SHARD KEY (ticker),
+    UNIQUE KEY (ticker, id) USING HASH,
+    KEY (trade_id) USING HASH
+);
+"""
+
+CREATE_SCHEMA_MIGRATIONS_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INT PRIMARY KEY,
+    description VARCHAR(255),
+    applied_at DATETIME(6) NOT NULL
+);
+"""
+
+# One-second OHLCV rollup of live_trades (schema version 3), maintained by the
+# simulator when ROLLUP_BARS is set. Rowstore, since every batch updates recent rows
+# in place. open_ts/close_ts are the participant_timestamps behind open and close;
+# notional is sum(price * size), so VWAP over any range is sum(notional) / sum(volume).
+CREATE_TRADE_BARS_TABLE = """
+CREATE ROWSTORE TABLE IF NOT EXISTS trade_bars_1s (
+    ticker VARCHAR(10) NOT NULL,
+    bucket_ns BIGINT NOT NULL,
+    open DECIMAL(18, 6),
+    open_ts BIGINT,
+    high DECIMAL(18, 6),
+    low DECIMAL(18, 6),
+    close DECIMAL(18, 6),
+    close_ts BIGINT,
+    volume BIGINT,
+    notional DECIMAL(30, 6),
+    trades BIGINT,
+    PRIMARY KEY (ticker, bucket_ns),
+    SHARD KEY (ticker)
+);
+"""
+
+# App tables (schema versions 4 and 5), previously created on every write
+CREATE_OPTIMIZED_PORTFOLIO_TABLE = """
+CREATE TABLE IF NOT EXISTS optimized_portfolio (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    user_id VARCHAR(100),
+    symbol VARCHAR(10),
+    quantity INT,
+    target_allocation FLOAT,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+CREATE_USER_ACTIVITIES_TABLE = """
+CREATE TABLE IF NOT EXISTS user_activities (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    user_id VARCHAR(100),
+    activity_type VARCHAR(50),
+    details JSON,
+    timestamp DATETIME
+);
+"""
+
+# optimized_portfolio keyed by (user_id, symbol) (schema version 6). One row per holding
+# makes a save a single multi-row upsert, and the primary key's leading user_id column
+# serves the per-user reads. Rowstore: small, and read and written by point lookups.
+CREATE_OPTIMIZED_PORTFOLIO_KEYED = """
+CREATE ROWSTORE TABLE IF NOT EXISTS {table} (
+    user_id VARCHAR(100) NOT NULL,
+    symbol VARCHAR(10) NOT NULL,
+    quantity INT,
+    target_allocation FLOAT,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, symbol),
+    SHARD KEY (user_id)
+);
+"""
@@ -1,27 +1,280 @@
 # database/repository.py
+import threading
+import time
+from decimal import Decimal
 import singlestoredb as s2
 import pandas as pd
+from database.database import db_connection
 from tradeSimulator.config import Config
+from tradeSimulator.db_handler import build_bar_rebuild_query
+
+# bar widths accepted by TradeRepository.get_bars, in seconds
+BAR_INTERVALS = {"1s": 1, "1m": 60, "5m": 300, "15m": 900, "1h": 3600}
+
+def rows_to_frame(rows, columns):
+    """
+    DataFrame from result tuples, with Decimal columns converted to float64.
+
+    Empty results keep their column names. Each column is checked by its first
+    non-null value, so the conversion is one vectorized cast per column.
+    """
+    df = pd.DataFrame(rows, columns=columns)
+    for column in df.columns[df.dtypes == object]:
+        first = df[column].first_valid_index()
+        if first is not None and isinstance(df.at[first, column], Decimal):
+            df[column] = df[column].astype("float64")
+    return df
+
+def add_trade_datetime(df):
+    """Add participant_timestamp as a datetime64 'datetime' column, if present."""
+    if "participant_timestamp" in df.columns:
+        df["datetime"] = pd.to_datetime(df["participant_timestamp"], unit="ns")
+    return df
 
 class TradeRepository:
-    def __init__(self):
-        db_url = Config.get_singlestore_db_url()
-        if db_url.startswith("mysql+pymysql"):
-            db_url = "mysql" + db_url[len("mysql+pymysql"):]
-        self.clean_url = db_url
-    
+    """
+    Read queries over live_trades and trade_bars_1s, on connections from the app-wide pool.
+
+    Results come back with their dtypes applied once, here: DECIMAL columns such as
+    price as float64, and trade queries with a datetime64 'datetime' column next to
+    participant_timestamp, so callers need no per-refresh conversions.
+    """
+
+    def _query(self, query, params=()):
+        """Run a query on a pooled connection, retrying once on a fresh one if it was lost."""
+        for attempt in range(2):
+            try:
+                with db_connection() as conn:
+                    cur = conn.cursor()
+                    try:
+                        cur.execute(query, params)
+                        if cur.description is None:
+                            return cur.rowcount
+                        rows = cur.fetchall()
+                        # Extract column names from the cursor description
+                        col_names = [desc[0] for desc in cur.description]
+                    finally:
+                        cur.close()
+                return rows_to_frame(rows, col_names)
+            except (s2.OperationalError, s2.InterfaceError):
+                # the pool has already discarded the failed connection
+                if attempt:
+                    raise
+
     def get_latest_trades(self, limit=50):
-        query = f"SELECT * FROM live_trades ORDER BY participant_timestamp DESC LIMIT {limit}"
-        conn = s2.connect(self.clean_url)
-        cur = conn.cursor()
-        try:
-            cur.execute(query)
-            rows = cur.fetchall()
-            # Extract column names from the cursor description
-            col_names = [desc[0] for desc in cur.description]
-            df = pd.DataFrame(rows, columns=col_names)
-        finally:
-            cur.close()
-            conn.close()
-        print(df.head())
+        query = "SELECT * FROM live_trades ORDER BY participant_timestamp DESC LIMIT %s"
+        return add_trade_datetime(self._query(query, (limit,)))
+
+    def get_trades_since(self, last_trade_id=None, ticker=None, since_timestamp=None, limit=1000, newest=False):
+        """
+        Trades added after the caller's cursor, oldest first.
+
+        Pass the largest trade_id seen so far as last_trade_id; without a cursor the latest
+        `limit` trades are returned to seed the caller's window. With newest=True only the
+        newest `limit` trades after the cursor are returned, for callers that keep a
+        fixed-size window and would otherwise fall behind a fast feed. since_timestamp
+        (participant_timestamp in ns) and ticker narrow the scan to the tail of the sort
+        key. trade_id grows with insertion order but is not a commit log: a batch
+        committed late can carry lower ids, so a caller that must not miss such rows
+        should poll with a small id overlap and de-duplicate on trade_id.
+        """
+        filters, params = [], []
+        if ticker is not None:
+            filters.append("ticker = %s")
+            params.append(ticker)
+        if since_timestamp is not None:
+            filters.append("participant_timestamp > %s")
+            params.append(since_timestamp)
+        if last_trade_id is None:
+            where = f"WHERE {' AND '.join(filters)} " if filters else ""
+            query = (
+                f"SELECT * FROM (SELECT * FROM live_trades {where}"
+                "ORDER BY participant_timestamp DESC LIMIT %s) latest ORDER BY participant_timestamp"
+            )
+        else:
+            filters.append("trade_id > %s")
+            params.append(last_trade_id)
+            where = " AND ".join(filters)
+            if newest:
+                query = (
+                    f"SELECT * FROM (SELECT * FROM live_trades WHERE {where} "
+                    "ORDER BY trade_id DESC LIMIT %s) latest ORDER BY trade_id"
+                )
+            else:
+                query = f"SELECT * FROM live_trades WHERE {where} ORDER BY trade_id LIMIT %s"
+        params.append(limit)
+        return add_trade_datetime(self._query(query, tuple(params)))
+
+    def get_bars(self, ticker=None, interval="1m", start_timestamp=None, end_timestamp=None,
+                 lookback_seconds=3600, use_rollup=None):
+        """
+        OHLCV bars with VWAP and trade counts, aggregated in SQL.
+
+        interval is one of BAR_INTERVALS. The range defaults to the last
+        lookback_seconds; timestamps are participant_timestamp nanoseconds, and the start
+        is aligned down to a bar boundary so the first bar is complete. use_rollup
+        (default ROLLUP_BARS) reads the one-second trade_bars_1s rollup instead of raw
+        trades. Returns one row per ticker and bar, with bar_start as a datetime.
+        """
+        if interval not in BAR_INTERVALS:
+            raise ValueError(f"Unsupported bar interval: {interval}")
+        if use_rollup is None:
+            use_rollup = Config.get_rollup_bars()
+        width = BAR_INTERVALS[interval] * 1_000_000_000
+        if start_timestamp is None:
+            start_timestamp = time.time_ns() - lookback_seconds * 1_000_000_000
+        start_timestamp = start_timestamp // width * width
+
+        time_column = "bucket_ns" if use_rollup else "participant_timestamp"
+        filters, params = [f"{time_column} >= %s"], [start_timestamp]
+        if end_timestamp is not None:
+            filters.append(f"{time_column} < %s")
+            params.append(end_timestamp)
+        if ticker is not None:
+            filters.append("ticker = %s")
+            params.append(ticker)
+        if use_rollup:
+            aggregates = (
+                "FIRST(open, open_ts) AS open, MAX(high) AS high, MIN(low) AS low, "
+                "LAST(close, close_ts) AS close, SUM(volume) AS volume, "
+                "SUM(notional) / NULLIF(SUM(volume), 0) AS vwap, SUM(trades) AS trades"
+            )
+            table = "trade_bars_1s"
+        else:
+            aggregates = (
+                "FIRST(price, participant_timestamp) AS open, MAX(price) AS high, MIN(price) AS low, "
+                "LAST(price, participant_timestamp) AS close, SUM(size) AS volume, "
+                "SUM(price * size) / NULLIF(SUM(size), 0) AS vwap, COUNT(*) AS trades"
+            )
+            table = "live_trades"
+        query = (
+            f"SELECT ticker, {time_column} DIV %s * %s AS bar_start_ns, {aggregates} "
+            f"FROM {table} WHERE {' AND '.join(filters)} "
+            "GROUP BY ticker, bar_start_ns ORDER BY ticker, bar_start_ns"
+        )
+        df = self._query(query, (width, width, *params))
+        df["bar_start"] = pd.to_datetime(df["bar_start_ns"], unit="ns")
         return df
+
+    def rebuild_bars(self, start_timestamp, end_timestamp, ticker=None):
+        """
+        Recompute trade_bars_1s from raw trades for [start_timestamp, end_timestamp).
+
+        Inserts rebuild the bars of a re-sent batch themselves; this repairs ranges
+        written some other way, e.g. before ROLLUP_BARS was turned on. Returns the
+        number of affected rows as reported by the server.
+        """
+        start_timestamp = start_timestamp // 1_000_000_000 * 1_000_000_000
+        filters, params = ["participant_timestamp >= %s", "participant_timestamp < %s"], [start_timestamp, end_timestamp]
+        if ticker is not None:
+            filters.append("ticker = %s")
+            params.append(ticker)
+        query = build_bar_rebuild_query(" AND ".join(filters))
+        return self._query(query, tuple(params))
+
+    def close(self):
+        # connections belong to the shared pool; nothing to release
+        pass
+
+class PortfolioRepository:
+    """
+    Reads and saves users' optimized portfolios.
+
+    Positions are cached per user for Config.get_portfolio_cache_ttl() seconds; a save
+    through this repository replaces the cached entry, so the saving process never
+    serves stale positions. Every save bumps the user's version, and a result is only
+    cached if the version is unchanged since its read or save began, so a read that
+    overlaps a save cannot cache the old positions. The TTL bounds staleness for writes
+    made elsewhere.
+    """
+
+    def __init__(self, cache_ttl=None):
+        self.cache_ttl = Config.get_portfolio_cache_ttl() if cache_ttl is None else cache_ttl
+        # user_id -> (expiry on the monotonic clock, {symbol: quantity})
+        self._cache = {}
+        # user_id -> number of saves started
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def _cached(self, user_id):
+        with self._lock:
+            entry = self._cache.get(user_id)
+            if entry is None or entry[0] < time.monotonic():
+                self._cache.pop(user_id, None)
+                return None
+            return dict(entry[1])
+
+    def _store(self, user_id, positions, version):
+        if self.cache_ttl > 0:
+            with self._lock:
+                if self._versions.get(user_id, 0) == version:
+                    self._cache[user_id] = (time.monotonic() + self.cache_ttl, dict(positions))
+
+    def get_positions(self, user_id):
+        """{symbol: quantity} of the user's optimized portfolio."""
+        with self._lock:
+            version = self._versions.get(user_id, 0)
+        positions = self._cached(user_id)
+        if positions is not None:
+            return positions
+        with db_connection() as conn:
+            cur = conn.cursor()
+            try:
+                cur.execute("SELECT symbol, quantity FROM optimized_portfolio WHERE user_id = %s", (user_id,))
+                positions = {symbol: quantity for symbol, quantity in cur.fetchall()}
+            finally:
+                cur.close()
+        self._store(user_id, positions, version)
+        return dict(positions)
+
+    def save(self, user_id, holdings):
+        """
+        Replace the user's optimized portfolio with holdings in one transaction.
+
+        holdings are dicts with symbol, quantity and target_allocation; repeated
+        symbols are summed. Current symbols are upserted in one multi-row statement and
+        symbols no longer held are deleted, so readers see either the old or the new
+        portfolio.
+        """
+        merged = {}
+        for holding in holdings:
+            quantity, allocation = merged.get(holding["symbol"], (0, 0.0))
+            merged[holding["symbol"]] = (quantity + holding["quantity"], allocation + holding["target_allocation"])
+        with self._lock:
+            self._cache.pop(user_id, None)
+            version = self._versions[user_id] = self._versions.get(user_id, 0) + 1
+        with db_connection() as conn:
+            cur = conn.cursor()
+            try:
+                if merged:
+                    symbols = list(merged)
+                    cur.execute(
+                        "DELETE FROM optimized_portfolio WHERE user_id = %s AND symbol NOT IN "
+                        f"({', '.join(['%s'] * len(symbols))})",
+                        (user_id, *symbols),
+                    )
+                    cur.execute(
+                        "INSERT INTO optimized_portfolio (user_id, symbol, quantity, target_allocation) VALUES "
+                        + ", ".join(["(%s, %s, %s, %s)"] * len(merged))
+                        + " ON DUPLICATE KEY UPDATE quantity = VALUES(quantity), "
+                        "target_allocation = VALUES(target_allocation), created_at = CURRENT_TIMESTAMP",
+                        [value for symbol, (quantity, allocation) in merged.items()
+                         for value in (user_id, symbol, quantity, allocation)],
+                    )
+                else:
+                    cur.execute("DELETE FROM optimized_portfolio WHERE user_id = %s", (user_id,))
+            finally:
+                cur.close()
+            # db_connection commits both statements together on exit
+        self._store(user_id, {symbol: quantity for symbol, (quantity, _) in merged.items()}, version)
+
+_portfolio_repository = None
+_portfolio_lock = threading.Lock()
+
+def get_portfolio_repository():
+    """The PortfolioRepository shared by the whole process, so its cache is too."""
+    global _portfolio_repository
+    with _portfolio_lock:
+        if _portfolio_repository is None:
+            _portfolio_repository = PortfolioRepository()
+        return _portfolio_repository
@@ -1,12 +1,9 @@
 import streamlit as st
-import os
-import singlestoredb as s2
 from components import portfolio, news, charts
 from services.stock_service import StockService
 from services.news_service import NewsService
 from services.ai_service import AIService
 from dotenv import load_dotenv
-import pandas as pd
 import plotly.express as px
 import multiprocessing
 from streamlit_autorefresh import st_autorefresh
@@ -22,59 +19,26 @@ st.set_page_config(
 
 # Import database initialization and repository for live_trades table
 from database.database import init_db
-from database.repository import TradeRepository
+from database.repository import get_portfolio_repository
+from services.live_trade_service import get_live_trade_service
 
 # Import the trade simulator module (runs the simulation process)
 import tradeSimulator.simulator as simulator
 
+# Trades shown in the Real-Time Trading View
+TRADE_WINDOW = 50
+
 
 def insert_optimized_portfolio(optimized_portfolio_data: dict, user_id: str):
     """
-    Inserts optimized portfolio positions into SingleStore.
+    Saves optimized portfolio positions to SingleStore, replacing the user's previous ones.
     """
-    config = {
-        "host": os.getenv('host'),
-        "port": os.getenv('port'),
-        "user": os.getenv('user'),
-        "password": os.getenv('password'),
-        "database": os.getenv('database')
-    }
-    connection = s2.connect(**config)
-    cursor = connection.cursor()
-
-    # Create table if not exists
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS optimized_portfolio (
-        id BIGINT AUTO_INCREMENT PRIMARY KEY,
-        user_id VARCHAR(100),
-        symbol VARCHAR(10),
-        quantity INT,
-        target_allocation FLOAT,
-        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-    );
-    """)
-
-    # Clear previous optimizations for this user
-    cursor.execute("DELETE FROM optimized_portfolio WHERE user_id = %s", (user_id, ))
-
-    insert_query = '''
-    INSERT INTO optimized_portfolio (user_id, symbol, quantity, target_allocation)
-    VALUES (%s, %s, %s, %s);
-    '''
-
-    for holding in optimized_portfolio_data.get("optimized_holdings", []):
-        data_tuple = (user_id, holding["symbol"], holding["quantity"], holding["target_allocation"])
-        cursor.execute(insert_query, data_tuple)
-
-    connection.commit()
-    cursor.close()
-    connection.close()
-
+    get_portfolio_repository().save(user_id, optimized_portfolio_data.get("optimized_holdings", []))
 
 def main():
     st.title("AI Financial Advisor 📈")
 
-    # Initialize the live_trades table using your database module
+    # Apply pending schema migrations before the simulator starts writing
     init_db()
 
     # Start the trade simulator process in the background (runs only once per session)
@@ -190,29 +154,14 @@ def main():
         # Auto-refresh the page every 500 ms using streamlit-autorefresh
         st_autorefresh(interval=500, key="trades_autorefresh")
 
-        # Query the latest trades using your TradeRepository
-        repo = TradeRepository()
-        try:
-            trades_df = repo.get_latest_trades(limit=50)
-        except Exception as e:
-            st.error(f"Error retrieving trades: {e}")
-            trades_df = None
+        # All sessions read the shared in-memory cache; only its poller queries the database
+        live_trades = get_live_trade_service()
+        trades_df = live_trades.latest(TRADE_WINDOW)
+        if live_trades.last_error is not None:
+            st.error(f"Error retrieving trades: {live_trades.last_error}")
 
         if trades_df is not None and not trades_df.empty:
-            # Debug: display the first few rows of the raw data
-            st.write("Raw trade data (first 5 rows):", trades_df.head())
-
-            # Convert the nanosecond timestamp to a datetime for proper plotting
-            try:
-                trades_df['datetime'] = pd.to_datetime(
-                    trades_df['participant_timestamp'], unit='ns', errors='coerce'
-                )
-            except Exception as e:
-                st.error(f"Error converting timestamps: {e}")
-
-            # Ensure the 'price' column is numeric (in case it comes as a string)
-            trades_df['price'] = pd.to_numeric(trades_df['price'], errors='coerce')
-
+            # price is float64 and 'datetime' is datetime64 already, straight from the cache
             st.subheader("Latest Trades")
             st.dataframe(trades_df.sort_values("participant_timestamp", ascending=False))
 
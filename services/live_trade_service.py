@@ -0,0 +1,148 @@
+import streamlit as st
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
+from database.repository import TradeRepository
+
+# Columns kept per trade in typed arrays; every other live_trades column is kept as objects
+RING_FIELDS = {
+    "ticker": object,
+    "trade_id": np.int64,
+    "participant_timestamp": np.int64,
+    "price": np.float64,
+    "size": np.int64,
+    "exchange": np.int64,
+}
+
+class TradeRing:
+    """Fixed-size ring buffer of the most recent trades, one NumPy array per field."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.arrays = {field: np.empty(capacity, dtype=dtype) for field, dtype in RING_FIELDS.items()}
+        self.written = 0
+
+    def extend(self, columns: dict):
+        n = len(columns["trade_id"])
+        for field in columns:
+            if field not in self.arrays:
+                self.arrays[field] = np.full(self.capacity, None, dtype=object)
+        if n > self.capacity:
+            columns = {field: values[-self.capacity:] for field, values in columns.items()}
+            self.written += n - self.capacity
+            n = self.capacity
+        positions = (self.written + np.arange(n)) % self.capacity
+        for field, values in columns.items():
+            self.arrays[field][positions] = values
+        self.written += n
+
+    def latest(self, limit: int) -> dict:
+        """Copies of the newest `limit` entries, oldest first."""
+        n = min(limit, self.written, self.capacity)
+        positions = (self.written - n + np.arange(n)) % self.capacity
+        return {field: values[positions] for field, values in self.arrays.items()}
+
+class LiveTradeService:
+    """
+    Process-wide cache of recent trades, shared by every Streamlit session.
+
+    One background thread polls TradeRepository.get_trades_since every poll_interval
+    seconds and appends the new trades to a ring buffer of `capacity` trades per ticker
+    plus one across all tickers. Sessions read from memory, so the database sees one
+    poller however many viewers are open. Polling pauses after idle_timeout seconds
+    without readers and resumes on the next read.
+    """
+
+    def __init__(self, repo: TradeRepository = None, capacity: int = 1000, poll_interval: float = 0.5,
+                 max_batch: int = 50000, idle_timeout: float = 60.0):
+        self.repo = repo or TradeRepository()
+        self.capacity = capacity
+        self.poll_interval = poll_interval
+        self.max_batch = max_batch
+        self.idle_timeout = idle_timeout
+        self.last_error = None
+        self._all = TradeRing(capacity)
+        self._tickers = {}
+        self._last_trade_id = None
+        # live_trades column order, for the frames returned by latest()
+        self._columns = list(RING_FIELDS)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._last_read = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="live-trade-poller", daemon=True)
+        self._thread.start()
+
+    def _append(self, df: pd.DataFrame):
+        columns = {}
+        for field in df.columns.drop("datetime", errors="ignore"):
+            dtype = RING_FIELDS.get(field, object)
+            if dtype is object:
+                values = df[field].astype(object)
+                columns[field] = values.where(values.notna(), None).to_numpy()
+            else:
+                # TradeRepository returns typed columns; only missing values need filling
+                columns[field] = df[field].to_numpy(dtype=dtype, na_value=0)
+        tickers = columns["ticker"] = df["ticker"].astype(str).to_numpy(dtype=object)
+        with self._lock:
+            self._columns = list(columns)
+            self._all.extend(columns)
+            for ticker in pd.unique(tickers):
+                mask = tickers == ticker
+                ring = self._tickers.get(ticker)
+                if ring is None:
+                    ring = self._tickers[ticker] = TradeRing(self.capacity)
+                ring.extend({field: values[mask] for field, values in columns.items()})
+            self._last_trade_id = int(columns["trade_id"].max())
+
+    def poll_once(self):
+        df = self.repo.get_trades_since(
+            self._last_trade_id, limit=self.capacity if self._last_trade_id is None else self.max_batch, newest=True
+        )
+        if not df.empty:
+            self._append(df)
+
+    def _run(self):
+        while True:
+            if time.monotonic() - self._last_read > self.idle_timeout:
+                self._wake.wait()
+            self._wake.clear()
+            try:
+                self.poll_once()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
+            time.sleep(self.poll_interval)
+
+    def latest(self, limit: int = 50, ticker: str = None) -> pd.DataFrame:
+        """
+        The newest `limit` cached trades, oldest first, for one ticker or all of them.
+
+        participant_timestamp is also returned as a datetime64 'datetime' column.
+        """
+        self._last_read = time.monotonic()
+        self._wake.set()
+        with self._lock:
+            ring = self._all if ticker is None else self._tickers.get(ticker)
+            columns = ring.latest(limit) if ring else {}
+            names = self._columns
+        n = len(columns["trade_id"]) if columns else 0
+        df = pd.DataFrame({
+            field: columns[field] if field in columns else np.full(n, None, dtype=RING_FIELDS.get(field, object))
+            for field in names
+        })
+        df["datetime"] = df["participant_timestamp"].to_numpy().astype("datetime64[ns]")
+        return df
+
+    def tickers(self) -> list:
+        with self._lock:
+            return sorted(self._tickers)
+
+@st.cache_resource
+def get_live_trade_service() -> LiveTradeService:
+    """The LiveTradeService shared by all sessions of this Streamlit server."""
+    return LiveTradeService(
+        capacity=int(os.getenv("LIVE_TRADE_BUFFER", "1000")),
+        poll_interval=float(os.getenv("LIVE_TRADE_POLL_INTERVAL", "0.5")),
+    )
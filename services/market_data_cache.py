@@ -0,0 +1,295 @@
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+PERIOD_UNITS = {"d": "days", "wk": "weeks", "mo": "months", "y": "years"}
+
+# Corporate action columns of yfinance history; any action re-adjusts all earlier bars
+ACTION_COLUMNS = ("Dividends", "Stock Splits")
+
+def period_start(period: str, today: pd.Timestamp = None):
+    """First date covered by a yfinance period such as "5d", "6mo" or "1y"; None for "max"."""
+    today = today if today is not None else pd.Timestamp.today().normalize()
+    if period == "max":
+        return None
+    if period == "ytd":
+        return today.replace(month=1, day=1)
+    match = re.fullmatch(r"(\d+)(d|wk|mo|y)", period)
+    if not match:
+        raise ValueError(f"Unsupported period: {period}")
+    return today - pd.DateOffset(**{PERIOD_UNITS[match.group(2)]: int(match.group(1))})
+
+def normalize_history(frame: pd.DataFrame) -> pd.DataFrame:
+    """Daily bars indexed by tz-naive date, sorted, one row per date."""
+    frame = frame.copy()
+    index = pd.DatetimeIndex(frame.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    frame.index = index.normalize().rename("Date")
+    frame = frame[~frame.index.duplicated(keep="last")]
+    return frame.sort_index()
+
+class TTLCache:
+    """Thread-safe LRU of at most max_entries values, each valid for ttl seconds."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+class FixtureFetcher:
+    """
+    Market data from local files, for tests and offline use.
+
+    The directory holds one <SYMBOL>.csv of daily bars per symbol (a Date column plus
+    Open/High/Low/Close/Volume, optionally Dividends and Stock Splits) and optionally
+    quotes.json mapping symbols to [price, prev_close]; without an entry there, quotes
+    are the last two closes.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _read(self, symbol: str):
+        path = os.path.join(self.directory, f"{symbol}.csv")
+        if not os.path.exists(path):
+            return None
+        return normalize_history(pd.read_csv(path, index_col="Date", parse_dates=["Date"]))
+
+    def history(self, symbols: list, period: str = "1y", start=None) -> dict:
+        start = start if start is not None else period_start(period)
+        frames = {}
+        for symbol in symbols:
+            frame = self._read(symbol)
+            if frame is not None:
+                frames[symbol] = frame if start is None else frame[frame.index >= start]
+        return frames
+
+    def quotes(self, symbols: list) -> dict:
+        path = os.path.join(self.directory, "quotes.json")
+        fixed = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                fixed = json.load(f)
+        quotes = {}
+        for symbol in symbols:
+            if symbol in fixed:
+                quotes[symbol] = tuple(fixed[symbol])
+                continue
+            frame = self._read(symbol)
+            closes = frame["Close"].dropna() if frame is not None else []
+            quotes[symbol] = (float(closes.iloc[-1]), float(closes.iloc[-2])) if len(closes) >= 2 else (0, 0)
+        return quotes
+
+class MarketDataCache:
+    """
+    Caches quotes and daily history in front of a fetcher.
+
+    Quotes are kept in memory for quote_ttl seconds. Daily history is kept in an
+    in-memory LRU and, with store_dir set, in one Parquet file per symbol, both
+    considered fresh for history_ttl seconds. A stale symbol is refreshed
+    incrementally: only bars from its second-to-last cached date on are fetched and
+    merged, the last bar being re-fetched since it may have been partial. Bars are
+    adjusted for splits and dividends, which changes every earlier bar, so when the
+    re-fetched complete bar's Close differs from the cached one, or the new bars carry
+    a dividend or split, the symbol is fetched in full instead. A request reaching
+    further back than the cache covers fetches the full period too. Symbols are
+    fetched together, one fetcher call per kind of refresh.
+
+    The fetcher provides history(symbols, period=..., start=...) and quotes(symbols),
+    both returning {symbol: ...} for the symbols it has data for. The Parquet store
+    needs pyarrow; without it only the memory cache is used.
+    """
+
+    def __init__(self, fetcher, store_dir: str = "", quote_ttl: float = 30.0, history_ttl: float = 6 * 3600.0,
+                 max_entries: int = 256):
+        self.fetcher = fetcher
+        self.store_dir = store_dir
+        self._quotes = TTLCache(max_entries, quote_ttl)
+        # symbol -> (covered_from, refreshed_at, frame); covered_from is None for full history
+        self._history = TTLCache(max_entries, history_ttl)
+        self.history_ttl = history_ttl
+        self._stats = dict.fromkeys(
+            ("quote_hits", "quote_misses", "history_hits", "history_disk_hits", "history_incremental", "history_full"), 0
+        )
+        self._lock = threading.Lock()
+        if store_dir:
+            os.makedirs(store_dir, exist_ok=True)
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def stats(self) -> dict:
+        """Hit and miss counts so far, plus the number of symbols held in memory."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["quotes_cached"] = len(self._quotes)
+        stats["histories_cached"] = len(self._history)
+        return stats
+
+    def _store_path(self, symbol: str) -> str:
+        return os.path.join(self.store_dir, re.sub(r"[^A-Za-z0-9^._-]", "_", symbol))
+
+    def _load(self, symbol: str):
+        if not self.store_dir:
+            return None
+        path = self._store_path(symbol)
+        try:
+            with open(f"{path}.json") as f:
+                meta = json.load(f)
+            frame = pd.read_parquet(f"{path}.parquet")
+        except (ImportError, OSError, ValueError):
+            return None
+        covered_from = pd.Timestamp(meta["covered_from"]) if meta["covered_from"] else None
+        return covered_from, meta["refreshed_at"], frame
+
+    def _replace(self, path: str, write):
+        """Write through write(tmp_path) to a unique temp file, then move it over path."""
+        fd, tmp = tempfile.mkstemp(dir=self.store_dir, suffix=".tmp")
+        os.close(fd)
+        try:
+            write(tmp)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def _save(self, symbol: str, entry):
+        if not self.store_dir:
+            return
+        covered_from, refreshed_at, frame = entry
+        path = self._store_path(symbol)
+        meta = {"covered_from": covered_from.isoformat() if covered_from is not None else None,
+                "refreshed_at": refreshed_at}
+
+        def write_meta(tmp):
+            with open(tmp, "w") as f:
+                json.dump(meta, f)
+        # sessions share the cache, so concurrent refreshes of a symbol must not share temp files
+        try:
+            self._replace(f"{path}.parquet", frame.to_parquet)
+            self._replace(f"{path}.json", write_meta)
+        except (ImportError, OSError):
+            pass
+
+    @staticmethod
+    def _covers(covered_from, start) -> bool:
+        return covered_from is None or (start is not None and covered_from <= start)
+
+    @staticmethod
+    def _readjusted(frame: pd.DataFrame, new: pd.DataFrame) -> bool:
+        """Whether new bars, fetched from frame's second-to-last date, change frame's adjusted prices."""
+        check = frame.index[-2]
+        if check not in new.index:
+            return True
+        if not np.isclose(new.at[check, "Close"], frame.at[check, "Close"], rtol=1e-6, equal_nan=True):
+            return True
+        actions = new.loc[new.index > check, [col for col in ACTION_COLUMNS if col in new.columns]]
+        return bool(actions.fillna(0).to_numpy().any())
+
+    def history(self, symbols: list, period: str = "1y") -> dict:
+        """Daily bars for period per symbol, {symbol: DataFrame}; symbols without data are left out."""
+        symbols = list(dict.fromkeys(symbols))
+        start = period_start(period)
+        entries, incremental, full = {}, {}, []
+        for symbol in symbols:
+            entry = self._history.get(symbol)
+            if entry is not None and self._covers(entry[0], start):
+                self._count("history_hits")
+                entries[symbol] = entry
+                continue
+            entry = self._load(symbol)
+            if entry is not None and self._covers(entry[0], start):
+                if time.time() - entry[1] < self.history_ttl:
+                    self._count("history_disk_hits")
+                    self._history.put(symbol, entry)
+                    entries[symbol] = entry
+                elif len(entry[2]) >= 2:
+                    incremental[symbol] = entry
+                else:
+                    full.append(symbol)
+            else:
+                full.append(symbol)
+
+        now = time.time()
+        if incremental:
+            # one request from the earliest second-to-last bar; each symbol keeps its own new rows
+            fetch_from = min(entry[2].index[-2] for entry in incremental.values())
+            fetched = self.fetcher.history(list(incremental), start=fetch_from)
+            for symbol, (covered_from, _, frame) in list(incremental.items()):
+                if symbol not in fetched:
+                    entries[symbol] = (covered_from, now, frame)
+                    continue
+                new = normalize_history(fetched[symbol])
+                if self._readjusted(frame, new):
+                    del incremental[symbol]
+                    full.append(symbol)
+                    continue
+                last = frame.index[-1]
+                entries[symbol] = (covered_from, now, pd.concat([frame[frame.index < last], new[new.index >= last]]))
+            self._count("history_incremental", len(incremental))
+        if full:
+            self._count("history_full", len(full))
+            fetched = self.fetcher.history(full, period=period)
+            for symbol in full:
+                if symbol in fetched:
+                    entries[symbol] = (start, now, normalize_history(fetched[symbol]))
+        for symbol in list(incremental) + full:
+            if symbol in entries:
+                self._history.put(symbol, entries[symbol])
+                self._save(symbol, entries[symbol])
+
+        result = {}
+        for symbol in symbols:
+            if symbol in entries:
+                frame = entries[symbol][2]
+                result[symbol] = frame if start is None else frame[frame.index >= start]
+        return result
+
+    def quotes(self, symbols: list) -> dict:
+        """{symbol: (price, prev_close)}, fetching only the symbols not cached within quote_ttl."""
+        symbols = list(dict.fromkeys(symbols))
+        quotes, missing = {}, []
+        for symbol in symbols:
+            quote = self._quotes.get(symbol)
+            if quote is None:
+                missing.append(symbol)
+            else:
+                quotes[symbol] = quote
+        self._count("quote_hits", len(quotes))
+        if missing:
+            self._count("quote_misses", len(missing))
+            for symbol, quote in self.fetcher.quotes(missing).items():
+                self._quotes.put(symbol, quote)
+                quotes[symbol] = quote
+        return quotes
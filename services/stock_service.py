@@ -1,18 +1,125 @@
 import yfinance as yf
 import pandas as pd
 import numpy as np
+import os
+import streamlit as st
+from concurrent.futures import ThreadPoolExecutor
+from services.market_data_cache import FixtureFetcher, MarketDataCache
+
+# Upper bound on concurrent per-symbol Yahoo Finance requests
+INFO_WORKERS = int(os.getenv("STOCK_INFO_WORKERS", "8"))
+
+def download(symbols: list, **kwargs) -> dict:
+    """One yf.download call for all symbols; {symbol: DataFrame}, without symbols that returned no data."""
+    if not symbols:
+        return {}
+    data = yf.download(symbols, group_by="ticker", progress=False, multi_level_index=True, **kwargs)
+    if data is None or data.empty:
+        return {}
+    frames = {}
+    downloaded = set(data.columns.get_level_values(0))
+    for symbol in symbols:
+        if symbol in downloaded:
+            frame = data[symbol].dropna(how="all")
+            if not frame.empty:
+                frames[symbol] = frame
+    return frames
+
+def fetch_concurrently(function, symbols: list) -> dict:
+    """{symbol: function(symbol)} with at most INFO_WORKERS requests in flight; failures map to None."""
+    def call(symbol):
+        try:
+            return function(symbol)
+        except Exception:
+            return None
+    if not symbols:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(INFO_WORKERS, len(symbols))) as pool:
+        return dict(zip(symbols, pool.map(call, symbols)))
+
+class YahooFetcher:
+    """Yahoo Finance source for MarketDataCache: batched downloads with per-symbol fallback."""
+
+    @staticmethod
+    def history(symbols: list, period: str = "1y", start=None) -> dict:
+        """Daily bars for period, or from start when given, {symbol: DataFrame}"""
+        kwargs = {"start": start.strftime("%Y-%m-%d")} if start is not None else {"period": period}
+        try:
+            # with actions, like Ticker.history: MarketDataCache checks them for re-adjustments
+            history = download(symbols, actions=True, **kwargs)
+        except Exception:
+            history = {}
+        missing = [symbol for symbol in symbols if symbol not in history]
+        for symbol, hist in fetch_concurrently(lambda s: yf.Ticker(s).history(**kwargs), missing).items():
+            if hist is not None and not hist.empty:
+                history[symbol] = hist
+        return history
+
+    @staticmethod
+    def quotes(symbols: list) -> dict:
+        """
+        Current price and previous close per symbol, {symbol: (price, prev_close)}.
+
+        Prices come from one batched download of recent daily bars; symbols it returns
+        no data for are looked up individually, concurrently. Unknown values are 0.
+        """
+        quotes = {}
+        try:
+            bars = download(symbols, period="5d", interval="1d")
+        except Exception:
+            bars = {}
+        for symbol, frame in bars.items():
+            closes = frame["Close"].dropna()
+            if len(closes) >= 2:
+                quotes[symbol] = (float(closes.iloc[-1]), float(closes.iloc[-2]))
+        missing = [symbol for symbol in symbols if symbol not in quotes]
+        for symbol, info in fetch_concurrently(lambda s: yf.Ticker(s).info, missing).items():
+            info = info or {}
+            quotes[symbol] = (info.get('regularMarketPrice', 0), info.get('previousClose', 0))
+        return quotes
+
+@st.cache_resource
+def get_market_data_cache() -> MarketDataCache:
+    """
+    The MarketDataCache shared by all sessions of this Streamlit server.
+
+    MARKET_DATA_FIXTURES serves data from a local fixture directory instead of Yahoo.
+    """
+    fixtures = os.getenv("MARKET_DATA_FIXTURES", "")
+    return MarketDataCache(
+        FixtureFetcher(fixtures) if fixtures else YahooFetcher(),
+        store_dir=os.getenv("MARKET_DATA_DIR", ".market_data"),
+        quote_ttl=float(os.getenv("QUOTE_TTL_SECONDS", "30")),
+        history_ttl=float(os.getenv("HISTORY_TTL_HOURS", "6")) * 3600,
+        max_entries=int(os.getenv("MARKET_DATA_CACHE_SIZE", "256")),
+    )
 
 class StockService:
+    # shortName per symbol; names do not change, so each is looked up once per process
+    _names = {}
+
     @staticmethod
     def get_stock_data(symbol: str, period: str = "1y") -> pd.DataFrame:
-        """Fetch stock data from Yahoo Finance"""
+        """Fetch stock data from Yahoo Finance, through the market data cache"""
         try:
-            stock = yf.Ticker(symbol)
-            hist = stock.history(period=period)
-            return hist
+            return get_market_data_cache().history([symbol], period)[symbol]
         except Exception as e:
             raise Exception(f"Failed to fetch stock data for {symbol}: {e}")
 
+    @staticmethod
+    def get_stocks_data(symbols: list, period: str = "1y") -> dict:
+        """Fetch stock data for several symbols in one request, {symbol: DataFrame}"""
+        history = get_market_data_cache().history(symbols, period)
+        for symbol in symbols:
+            if symbol not in history:
+                raise Exception(f"Failed to fetch stock data for {symbol}")
+        return {symbol: history[symbol] for symbol in symbols}
+
+    @staticmethod
+    def get_quotes(symbols: list) -> dict:
+        """Current price and previous close per symbol, {symbol: (price, prev_close)}"""
+        return get_market_data_cache().quotes(symbols)
+
     @staticmethod
     def get_portfolio_performance(positions: dict) -> dict:
         """Calculate portfolio performance"""
@@ -21,25 +128,24 @@ class StockService:
             'daily_change': 0,
             'holdings': []
         }
-        
+
+        quotes = StockService.get_quotes(list(positions))
         for symbol, quantity in positions.items():
-            stock = yf.Ticker(symbol)
-            current_price = stock.info.get('regularMarketPrice', 0)
-            prev_close = stock.info.get('previousClose', 0)
-            
+            current_price, prev_close = quotes[symbol]
+
             position_value = current_price * quantity
             daily_change = (current_price - prev_close) * quantity
-            
+
             performance['holdings'].append({
                 'symbol': symbol,
                 'quantity': quantity,
                 'value': position_value,
                 'daily_change': daily_change
             })
-            
+
             performance['total_value'] += position_value
             performance['daily_change'] += daily_change
-            
+
         return performance
 
     @staticmethod
@@ -47,14 +153,19 @@ class StockService:
         """Get summary of major market indices"""
         indices = ['^GSPC', '^DJI', '^IXIC']  # S&P 500, Dow Jones, NASDAQ
         summary = {}
-        
+
+        quotes = StockService.get_quotes(indices)
+        unnamed = [index for index in indices if index not in StockService._names]
+        for index, info in fetch_concurrently(lambda s: yf.Ticker(s).info, unnamed).items():
+            if info:
+                StockService._names[index] = info.get('shortName', '')
         for index in indices:
-            idx = yf.Ticker(index)
-            info = idx.info
+            price, prev_close = quotes[index]
             summary[index] = {
-                'name': info.get('shortName', ''),
-                'price': info.get('regularMarketPrice', 0),
-                'change': info.get('regularMarketChangePercent', 0)
+                'name': StockService._names.get(index, ''),
+                'price': price,
+                # percent, as in Yahoo's regularMarketChangePercent
+                'change': (price / prev_close - 1) * 100 if prev_close else 0
             }
-            
+
         return summary
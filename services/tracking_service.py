@@ -1,44 +1,128 @@
 import streamlit as st
+import atexit
 import os
-import singlestoredb as s2
+import threading
+import time
+from collections import deque
+from database.database import db_connection
 from datetime import datetime
 import json
 
+INSERT_ACTIVITIES = "INSERT INTO user_activities (user_id, activity_type, details, timestamp) VALUES "
+
+# What ActivityLogger does with a new event when the queue is full
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest")
+
+class ActivityLogger:
+    """
+    Writes user activities to user_activities from a background thread.
+
+    log() only appends to a bounded in-memory queue, so the UI never waits for the
+    database. The writer thread flushes a multi-row INSERT when batch_size events are
+    queued or flush_interval seconds after the oldest unflushed one. When max_queue
+    events are waiting, the overflow policy drops either the oldest queued event or the
+    new one; dropped events are counted in `dropped`. A failed flush is reported and its
+    batch discarded, since activity logging must not back up into the app. Pending
+    events are flushed by close(), which runs at interpreter exit.
+    """
+
+    def __init__(self, batch_size: int = 100, flush_interval: float = 2.0, max_queue: int = 10000,
+                 overflow: str = "drop_oldest"):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.overflow = overflow
+        self.dropped = 0
+        self.last_error = None
+        self._queue = deque()
+        self._oldest = None
+        self._closing = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="activity-logger", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def log(self, user_id: str, activity_type: str, details: dict = None):
+        row = (user_id, activity_type, json.dumps(details), datetime.now())
+        with self._cond:
+            if self._closing:
+                return
+            if len(self._queue) >= self.max_queue:
+                self.dropped += 1
+                if self.overflow == "drop_newest":
+                    return
+                self._queue.popleft()
+            if not self._queue:
+                self._oldest = time.monotonic()
+                # wake the writer from its untimed wait so it starts the flush_interval timer
+                self._cond.notify()
+            self._queue.append(row)
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify()
+
+    def _take_batch(self) -> list:
+        batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+        self._oldest = time.monotonic() if self._queue else None
+        return batch
+
+    def _write(self, batch: list):
+        placeholders = ", ".join(["(%s, %s, %s, %s)"] * len(batch))
+        params = [value for row in batch for value in row]
+        try:
+            with db_connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute(INSERT_ACTIVITIES + placeholders, params)
+                cursor.close()
+            self.last_error = None
+        except Exception as e:
+            self.last_error = e
+            print(f"Error logging {len(batch)} user activities: {e}")
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closing:
+                    if len(self._queue) >= self.batch_size:
+                        break
+                    if self._queue:
+                        remaining = self._oldest + self.flush_interval - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                    else:
+                        self._cond.wait()
+                if self._closing and not self._queue:
+                    return
+                batch = self._take_batch()
+            self._write(batch)
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._queue)
+
+    def close(self, timeout: float = 10.0):
+        """Stop accepting events and flush the queued ones, waiting up to timeout seconds."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+        self._thread.join(timeout)
+
+@st.cache_resource
+def get_activity_logger() -> ActivityLogger:
+    """The ActivityLogger shared by all sessions of this Streamlit server."""
+    return ActivityLogger(
+        batch_size=int(os.getenv("ACTIVITY_LOG_BATCH", "100")),
+        flush_interval=float(os.getenv("ACTIVITY_LOG_FLUSH_INTERVAL", "2.0")),
+        max_queue=int(os.getenv("ACTIVITY_LOG_QUEUE", "10000")),
+        overflow=os.getenv("ACTIVITY_LOG_OVERFLOW", "drop_oldest"),
+    )
+
 class TrackingService:
     @staticmethod
     def log_activity(activity_type: str, details: dict = None):
-        """Log user activity to database"""
-        config = {
-            "host": os.getenv('host'),
-            "port": os.getenv('port'),
-            "user": os.getenv('user'),
-            "password": os.getenv('password'),
-            "database": os.getenv('database')
-        }
-        
-        connection = s2.connect(**config)
-        cursor = connection.cursor()
-        
-        # Create table if it doesn't exist
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS user_activities (
-                id BIGINT AUTO_INCREMENT PRIMARY KEY,
-                user_id VARCHAR(100),
-                activity_type VARCHAR(50),
-                details JSON,
-                timestamp DATETIME
-            )
-        """)
-        
+        """Queue a user activity for the background activity logger"""
         # Get user_id from session state
         user_id = st.session_state.get('user_id', 'anonymous')
-        
-        # Insert activity
-        cursor.execute(
-            "INSERT INTO user_activities (user_id, activity_type, details, timestamp) VALUES (%s, %s, %s, %s)",
-            (user_id, activity_type, json.dumps(details), datetime.now())
-        )
-        
-        connection.commit()
-        cursor.close()
-        connection.close()
+        get_activity_logger().log(user_id, activity_type, details)
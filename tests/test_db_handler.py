@@ -0,0 +1,51 @@
+import pytest
+from tradeSimulator.db_handler import BAR_UPSERT_QUERY, DBHandler, DuplicateInsertRace
+from tradeSimulator.utils import ROW_COLUMNS
+
+def trade(ticker, trade_id, price, size, ts):
+    values = dict.fromkeys(ROW_COLUMNS)
+    values.update(ticker=ticker, id=trade_id, price=price, size=size, participant_timestamp=ts)
+    return tuple(values[column] for column in ROW_COLUMNS)
+
+class FakeCursor:
+    """Records statements; live_trades holds the (ticker, id) keys already stored."""
+
+    def __init__(self, stored=(), skip=0):
+        self.stored = set(stored)
+        self.skip = skip
+        self.inserted = []
+        self.upserts = []
+        self.rowcount = 0
+
+    def execute(self, query, params=()):
+        self.query = query
+
+    def fetchall(self):
+        return [list(key) for key in self.stored]
+
+    def executemany(self, query, rows):
+        if query == BAR_UPSERT_QUERY:
+            self.upserts += rows
+        else:
+            self.inserted += rows
+            self.rowcount = len(rows) - self.skip
+
+def handler():
+    return DBHandler(None, pool=object(), insert_mode="executemany", ignore_duplicates=True, rollup_bars=True)
+
+BATCH = [trade("AAPL", "1", 10.0, 5, 1_000_000_000), trade("AAPL", "2", 12.0, 1, 1_500_000_000)]
+
+def test_resent_trades_are_not_counted_twice():
+    cur = FakeCursor(stored={("AAPL", "1")})
+    handler()._write(cur, BATCH)
+    assert cur.inserted == BATCH[1:]
+    assert [bar[:2] + bar[-3:] for bar in cur.upserts] == [("AAPL", 1_000_000_000, 1, 12.0, 1)]
+
+def test_fully_stored_batch_writes_nothing():
+    cur = FakeCursor(stored={("AAPL", "1"), ("AAPL", "2")})
+    handler()._write(cur, BATCH)
+    assert cur.inserted == cur.upserts == []
+
+def test_concurrently_stored_trade_is_retried():
+    with pytest.raises(DuplicateInsertRace):
+        handler()._write(FakeCursor(skip=1), BATCH)
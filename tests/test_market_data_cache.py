@@ -0,0 +1,115 @@
+import os
+import shutil
+import pandas as pd
+import pytest
+from services.market_data_cache import FixtureFetcher, MarketDataCache
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "market_data")
+
+pytest.importorskip("pyarrow")
+
+class RecordingFetcher(FixtureFetcher):
+    """FixtureFetcher that records the history and quote requests it serves."""
+
+    def __init__(self, directory):
+        super().__init__(directory)
+        self.history_calls = []
+        self.quote_calls = []
+
+    def history(self, symbols, period="1y", start=None):
+        self.history_calls.append((list(symbols), period, start))
+        return super().history(symbols, period, start)
+
+    def quotes(self, symbols):
+        self.quote_calls.append(list(symbols))
+        return super().quotes(symbols)
+
+@pytest.fixture
+def fixtures(tmp_path):
+    """A writable copy of the fixture directory, so tests can append bars."""
+    directory = tmp_path / "fixtures"
+    shutil.copytree(FIXTURES, directory)
+    return directory
+
+def test_history_memory_hit(fixtures, tmp_path):
+    fetcher = RecordingFetcher(fixtures)
+    cache = MarketDataCache(fetcher, store_dir=str(tmp_path / "store"))
+    first = cache.history(["AAPL", "MSFT"], "max")
+    second = cache.history(["AAPL", "MSFT"], "max")
+    assert len(fetcher.history_calls) == 1
+    assert len(first["AAPL"]) == 5
+    pd.testing.assert_frame_equal(first["MSFT"], second["MSFT"])
+    stats = cache.stats()
+    assert stats["history_full"] == 2
+    assert stats["history_hits"] == 2
+    assert stats["histories_cached"] == 2
+
+def test_history_disk_hit(fixtures, tmp_path):
+    store = str(tmp_path / "store")
+    MarketDataCache(RecordingFetcher(fixtures), store_dir=store).history(["AAPL"], "max")
+    fetcher = RecordingFetcher(fixtures)
+    cache = MarketDataCache(fetcher, store_dir=store)
+    frame = cache.history(["AAPL"], "max")["AAPL"]
+    assert fetcher.history_calls == []
+    assert frame["Close"].iloc[-1] == 185.56
+    assert cache.stats()["history_disk_hits"] == 1
+    assert not [name for name in os.listdir(store) if name.endswith(".tmp")]
+
+def test_history_incremental_refresh(fixtures, tmp_path):
+    store = str(tmp_path / "store")
+    MarketDataCache(RecordingFetcher(fixtures), store_dir=store).history(["AAPL"], "max")
+    with open(fixtures / "AAPL.csv", "a") as f:
+        f.write("2024-01-09,183.92,185.15,182.73,185.14,42841800\n")
+    fetcher = RecordingFetcher(fixtures)
+    # history_ttl=0 makes the stored history stale straight away
+    cache = MarketDataCache(fetcher, store_dir=store, history_ttl=0)
+    frame = cache.history(["AAPL"], "max")["AAPL"]
+    assert fetcher.history_calls == [(["AAPL"], "1y", pd.Timestamp("2024-01-05"))]
+    assert len(frame) == 6
+    assert frame.index[-1] == pd.Timestamp("2024-01-09")
+    assert not frame.index.duplicated().any()
+    stats = cache.stats()
+    assert stats["history_incremental"] == 1
+    assert stats["history_full"] == 0
+
+def test_quotes_hits_and_misses(fixtures):
+    fetcher = RecordingFetcher(fixtures)
+    cache = MarketDataCache(fetcher)
+    assert cache.quotes(["AAPL", "MSFT"]) == {"AAPL": (185.56, 181.18), "MSFT": (374.69, 367.75)}
+    cache.quotes(["MSFT", "AAPL"])
+    assert fetcher.quote_calls == [["AAPL", "MSFT"]]
+    stats = cache.stats()
+    assert stats["quote_misses"] == 2
+    assert stats["quote_hits"] == 2
+    assert stats["quotes_cached"] == 2
+
+def test_split_triggers_full_refresh(fixtures, tmp_path):
+    store = str(tmp_path / "store")
+    MarketDataCache(RecordingFetcher(fixtures), store_dir=store).history(["AAPL"], "max")
+    # a 4:1 split: the source re-adjusts every earlier bar and reports the split
+    bars = pd.read_csv(fixtures / "AAPL.csv")
+    bars[["Open", "High", "Low", "Close"]] /= 4
+    bars["Stock Splits"] = 0.0
+    bars.loc[len(bars)] = ["2024-01-09", 45.98, 46.29, 45.68, 46.29, 171367200, 4.0]
+    bars.to_csv(fixtures / "AAPL.csv", index=False)
+    fetcher = RecordingFetcher(fixtures)
+    cache = MarketDataCache(fetcher, store_dir=store, history_ttl=0)
+    frame = cache.history(["AAPL"], "max")["AAPL"]
+    assert [start for _, _, start in fetcher.history_calls] == [pd.Timestamp("2024-01-05"), None]
+    assert frame["Close"].iloc[0] == pytest.approx(185.64 / 4)
+    assert len(frame) == 6
+    stats = cache.stats()
+    assert stats["history_incremental"] == 0
+    assert stats["history_full"] == 1
+
+def test_dividend_triggers_full_refresh(fixtures, tmp_path):
+    store = str(tmp_path / "store")
+    MarketDataCache(RecordingFetcher(fixtures), store_dir=store).history(["AAPL"], "max")
+    # reported on the new bar, before the overlapping bar's close reflects it
+    bars = pd.read_csv(fixtures / "AAPL.csv")
+    bars["Dividends"] = 0.0
+    bars.loc[len(bars)] = ["2024-01-09", 183.92, 185.15, 182.73, 185.14, 42841800, 0.24]
+    bars.to_csv(fixtures / "AAPL.csv", index=False)
+    cache = MarketDataCache(RecordingFetcher(fixtures), store_dir=store, history_ttl=0)
+    cache.history(["AAPL"], "max")
+    assert cache.stats()["history_full"] == 1
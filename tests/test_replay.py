@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import pytest
+from tradeSimulator.generator import ID_INDEX, SOURCE_COLUMNS
+from tradeSimulator.replay import ReplayGenerator
+
+@pytest.fixture
+def tape(tmp_path):
+    """A six-trade tape, one microsecond apart."""
+    df = pd.DataFrame({column: np.arange(6) for column in SOURCE_COLUMNS})
+    df["ticker"] = ["AAPL", "MSFT"] * 3
+    df["id"] = [f"t{i}" for i in range(6)]
+    for column in ("participant_timestamp", "sip_timestamp", "trf_timestamp"):
+        df[column] = 1_700_000_000_000_000_000 + np.arange(6) * 1000
+    path = tmp_path / "tape.csv"
+    df.to_csv(path, index=False)
+    return str(path)
+
+def replay_ids(generator, count):
+    ids = []
+    while len(ids) < count:
+        batch = generator.next_batch(count - len(ids))
+        if not batch:
+            break
+        ids += [row[ID_INDEX] for row in batch]
+    return ids
+
+def test_ids_are_unique_per_run(tape):
+    first = replay_ids(ReplayGenerator(tape, speed=0, run_id="a"), 6)
+    second = replay_ids(ReplayGenerator(tape, speed=0, run_id="b"), 6)
+    assert first[0] == "t0-a-0"
+    assert not set(first) & set(second)
+
+def test_looped_passes_get_new_ids(tape):
+    ids = replay_ids(ReplayGenerator(tape, speed=0, chunk_size=4, loop=True, run_id="a"), 12)
+    assert len(ids) == len(set(ids)) == 12
+    assert ids[6] == "t0-a-1"
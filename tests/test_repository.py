@@ -0,0 +1,95 @@
+from contextlib import contextmanager
+from decimal import Decimal
+import pytest
+import database.repository as repository
+from database.repository import TradeRepository
+
+class FakeCursor:
+    def __init__(self, rows, columns):
+        self.rows = rows
+        self.description = [(column,) for column in columns]
+
+    def execute(self, query, params=()):
+        pass
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+class FakeConnection:
+    def __init__(self, rows, columns):
+        self.rows = rows
+        self.columns = columns
+
+    def cursor(self):
+        return FakeCursor(self.rows, self.columns)
+
+@pytest.fixture
+def serve(monkeypatch):
+    """Make TradeRepository queries return the given rows and columns."""
+    def install(rows, columns):
+        @contextmanager
+        def db_connection():
+            yield FakeConnection(rows, columns)
+        monkeypatch.setattr(repository, "db_connection", db_connection)
+    return install
+
+TRADE_COLUMNS = ["trade_id", "ticker", "participant_timestamp", "price", "size"]
+
+def test_get_trades_since_types_columns(serve):
+    serve([(1, "AAPL", 1_700_000_000_000_000_000, Decimal("189.25"), 100)], TRADE_COLUMNS)
+    df = TradeRepository().get_trades_since(0)
+    assert df["price"].dtype == "float64"
+    assert df["price"].iloc[0] == 189.25
+    assert str(df["datetime"].dtype) == "datetime64[ns]"
+
+@pytest.mark.parametrize("empty", [(), []])
+def test_get_trades_since_empty_result(serve, empty):
+    serve(empty, TRADE_COLUMNS)
+    df = TradeRepository().get_trades_since(42)
+    assert df.empty
+    assert list(df.columns) == TRADE_COLUMNS + ["datetime"]
+
+def test_get_bars_empty_window(serve):
+    serve((), ["ticker", "bar_start_ns", "open", "high", "low", "close", "volume", "vwap", "trades"])
+    df = TradeRepository().get_bars("AAPL", "1m", use_rollup=False)
+    assert df.empty
+    assert "bar_start" in df.columns
+
+class PortfolioCursor:
+    """Returns the stored positions; on_read runs while a SELECT's rows are fetched."""
+
+    def __init__(self, rows, on_read):
+        self.rows = rows
+        self.on_read = on_read
+
+    def execute(self, query, params=()):
+        self.query = query
+
+    def fetchall(self):
+        rows = list(self.rows)
+        if self.on_read:
+            on_read, self.on_read = self.on_read, None
+            on_read()
+        return rows
+
+    def close(self):
+        pass
+
+def test_read_overlapping_a_save_is_not_cached(monkeypatch):
+    portfolio = repository.PortfolioRepository(cache_ttl=300)
+    cursor = PortfolioCursor(
+        [("AAPL", 10)],
+        lambda: portfolio.save("u1", [{"symbol": "MSFT", "quantity": 5, "target_allocation": 1.0}]),
+    )
+
+    @contextmanager
+    def db_connection():
+        yield type("Connection", (), {"cursor": lambda self: cursor})()
+    monkeypatch.setattr(repository, "db_connection", db_connection)
+
+    # the read fetched the old rows before the save committed
+    assert portfolio.get_positions("u1") == {"AAPL": 10}
+    assert portfolio.get_positions("u1") == {"MSFT": 5}
@@ -0,0 +1,49 @@
+import threading
+import time
+import pytest
+from services.tracking_service import ActivityLogger
+
+class RecordingLogger(ActivityLogger):
+    """ActivityLogger whose batches are recorded instead of written to the database."""
+
+    def __init__(self, **kwargs):
+        self.batches = []
+        self.written = threading.Event()
+        super().__init__(**kwargs)
+
+    def _write(self, batch):
+        self.batches.append(batch)
+        self.written.set()
+
+@pytest.fixture
+def make_logger():
+    loggers = []
+    def make(**kwargs):
+        logger = RecordingLogger(**kwargs)
+        loggers.append(logger)
+        return logger
+    yield make
+    for logger in loggers:
+        logger.close()
+
+def test_flushes_after_interval_when_idle(make_logger):
+    logger = make_logger(batch_size=100, flush_interval=0.2)
+    time.sleep(0.1)  # the writer is idle, waiting for a first event
+    logger.log("user", "click", {"page": "home"})
+    assert logger.written.wait(1.5)
+    assert len(logger.batches[0]) == 1
+    assert logger.pending() == 0
+
+def test_flushes_full_batch_without_waiting(make_logger):
+    logger = make_logger(batch_size=3, flush_interval=60)
+    for i in range(3):
+        logger.log("user", "click", {"i": i})
+    assert logger.written.wait(1.5)
+    assert len(logger.batches[0]) == 3
+
+def test_drop_newest_when_full(make_logger):
+    logger = make_logger(batch_size=100, flush_interval=60, max_queue=2, overflow="drop_newest")
+    for i in range(3):
+        logger.log("user", "click", {"i": i})
+    assert logger.dropped == 1
+    assert logger.pending() == 2
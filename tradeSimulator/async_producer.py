@@ -0,0 +1,91 @@
+import logging
+import time
+import aiomysql
+from typing import List, Optional, Tuple
+from urllib.parse import unquote, urlparse
+from tenacity import retry, wait_exponential, stop_after_attempt, retry_if_exception_type
+from aiomysql import DatabaseError
+from tradeSimulator.config import Config
+from tradeSimulator.db_handler import (
+    BAR_UPSERT_QUERY, COMMIT_SECONDS, CONNECT_SECONDS, EXECUTE_SECONDS, INSERT_ERRORS, INSERT_RETRIES, TABLE_NAME,
+    TRADES_INSERTED, bar_deltas, build_multirow_inserts,
+)
+from tradeSimulator.utils import ROW_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+def parse_db_url(db_url: str) -> dict:
+    """Turn a mysql[+driver]://user:password@host:port/database URL into connect kwargs."""
+    url = urlparse(db_url)
+    return {
+        "host": url.hostname,
+        "port": url.port or 3306,
+        "user": unquote(url.username or ""),
+        "password": unquote(url.password or ""),
+        "db": url.path.lstrip("/") or None,
+    }
+
+class AsyncDBProducer:
+    """
+    asyncio counterpart of DBProducer built on aiomysql.
+
+    Many batches can be in flight on one event loop; they share a pool of at most
+    DB_POOL_SIZE connections. Inserts use the same retry policy as
+    DBHandler.insert_trades and support the executemany and multirow insert modes.
+    """
+
+    def __init__(self, db_url: str, insert_mode: Optional[str] = None, pool_size: Optional[int] = None):
+        self.insert_mode = insert_mode or Config.get_insert_mode()
+        if self.insert_mode not in ("executemany", "multirow"):
+            raise ValueError(f"Unsupported insert mode for the async producer: {self.insert_mode}")
+        self.connect_kwargs = parse_db_url(db_url)
+        self.pool_size = pool_size or Config.get_db_pool_size()
+        self.max_statement_bytes = Config.get_insert_max_bytes()
+        self.rollup_bars = Config.get_rollup_bars()
+        self.insert_query = (
+            f"INSERT INTO {TABLE_NAME} ({', '.join(ROW_COLUMNS)}) "
+            f"VALUES ({', '.join(['%s'] * len(ROW_COLUMNS))})"
+        )
+        self.pool = None
+
+    async def start(self):
+        self.pool = await aiomysql.create_pool(minsize=1, maxsize=self.pool_size, **self.connect_kwargs)
+
+    @retry(
+        stop=stop_after_attempt(5),
+        wait=wait_exponential(multiplier=1, min=1, max=5),
+        retry=retry_if_exception_type(DatabaseError),
+        before_sleep=lambda retry_state: INSERT_RETRIES.inc()
+    )
+    async def produce_batch(self, trades: List[Tuple]):
+        if not trades:
+            return
+        start = time.perf_counter()
+        async with self.pool.acquire() as conn:
+            CONNECT_SECONDS.observe(time.perf_counter() - start)
+            async with conn.cursor() as cur:
+                try:
+                    start = time.perf_counter()
+                    if self.insert_mode == "executemany":
+                        await cur.executemany(self.insert_query, trades)
+                    else:
+                        for sql, params in build_multirow_inserts(trades, self.max_statement_bytes):
+                            await cur.execute(sql, params)
+                    if self.rollup_bars:
+                        await cur.executemany(BAR_UPSERT_QUERY, bar_deltas(trades))
+                    EXECUTE_SECONDS.observe(time.perf_counter() - start)
+                    start = time.perf_counter()
+                    await conn.commit()
+                    COMMIT_SECONDS.observe(time.perf_counter() - start)
+                    TRADES_INSERTED.inc(len(trades))
+                    logger.debug(f"Inserted {len(trades)} trades into the database ({self.insert_mode}).")
+                except DatabaseError as e:
+                    INSERT_ERRORS.inc()
+                    # the pool closes connections released mid-transaction, so a retry gets a fresh one
+                    logger.error(f"Database error inserting trades: {e}")
+                    raise
+
+    async def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            await self.pool.wait_closed()
@@ -0,0 +1,138 @@
+import asyncio
+import logging
+import time
+from typing import Callable, Optional
+from tradeSimulator.config import Config
+from tradeSimulator.pipeline import (
+    BACKPRESSURE_POLICIES, BATCHES_FAILED, QUEUE_DEPTH, RATE_LIMIT_WAIT_SECONDS, TRADES_DROPPED, TRADES_GENERATED,
+    TRADES_SENT,
+)
+from tradeSimulator.utils import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+class AsyncBatchPipeline:
+    """
+    asyncio counterpart of BatchPipeline.
+
+    Each submitted batch becomes a task awaiting producer.produce_batch; at most
+    max_in_flight tasks run at once. With the "block" policy submit() waits for a free
+    slot, with "drop" the batch is discarded. The first failure is re-raised from the
+    next submit().
+    """
+
+    def __init__(self, producer, max_in_flight: int, policy: str = "block"):
+        if policy not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"Unsupported backpressure policy: {policy}")
+        self.producer = producer
+        self.policy = policy
+        self.max_in_flight = max_in_flight
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._tasks = set()
+        self._completed = 0
+        self._dropped = 0
+        self._error: Optional[BaseException] = None
+        QUEUE_DEPTH.set_function(lambda: len(self._tasks))
+
+    async def _send(self, batch: list):
+        try:
+            await self.producer.produce_batch(batch)
+            self._completed += len(batch)
+            TRADES_SENT.inc(len(batch))
+        except Exception as e:
+            logger.error(f"Failed to send batch of {len(batch)} trades: {e}")
+            BATCHES_FAILED.inc()
+            if self._error is None:
+                self._error = e
+        finally:
+            self._slots.release()
+
+    async def submit(self, batch: list) -> bool:
+        """Start sending a batch. Returns False if it was dropped."""
+        if self._error is not None:
+            raise self._error
+        if self.policy == "drop" and self._slots.locked():
+            self._dropped += len(batch)
+            TRADES_DROPPED.inc(len(batch))
+            return False
+        await self._slots.acquire()
+        task = asyncio.create_task(self._send(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "completed": self._completed,
+            "dropped": self._dropped,
+            "queue_depth": len(self._tasks),
+            "max_queue": self.max_in_flight,
+        }
+
+    async def close(self):
+        """Wait for the batches in flight."""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+async def run_async_simulation(
+    next_batch: Callable[[int], list],
+    producer,
+    throughput: int,
+    batch_size: int,
+    max_in_flight: int,
+    duration: Optional[float] = None,
+    stop_event=None,
+    report: Optional[Callable[[dict], None]] = None,
+    pacing_delay: Optional[Callable[[], float]] = None,
+) -> dict:
+    """
+    Generate, rate-limit and send batches on the running event loop.
+
+    Runs until cancelled, stop_event is set, or for `duration` seconds when given, and
+    returns the final pipeline stats. report receives the stats every LOG_INTERVAL
+    seconds and at the end. pacing_delay, for generators that schedule their own trades,
+    gives the seconds to wait before sending the batch just generated; an empty batch
+    ends the run. The producer must provide async start/produce_batch/close.
+    """
+    rate_limiter = TokenBucket(throughput, burst=Config.get_burst() or batch_size)
+    await producer.start()
+    pipeline = AsyncBatchPipeline(producer, max_in_flight, Config.get_backpressure_policy())
+    started = last_log_time = time.time()
+
+    def report_stats():
+        stats = pipeline.stats()
+        stats["achieved_rate"] = rate_limiter.achieved_rate()
+        if report:
+            report(stats)
+        return stats
+
+    try:
+        while duration is None or time.time() - started < duration:
+            if stop_event is not None and stop_event.is_set():
+                break
+            trades_list = next_batch(batch_size)
+            if not trades_list:
+                logger.info("Reached the end of the source data.")
+                break
+            TRADES_GENERATED.inc(len(trades_list))
+            if pacing_delay is not None:
+                delay = pacing_delay()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+            RATE_LIMIT_WAIT_SECONDS.observe(await rate_limiter.acquire_async(len(trades_list)))
+            await pipeline.submit(trades_list)
+
+            now = time.time()
+            if now - last_log_time > Config.get_log_interval():
+                stats = report_stats()
+                logger.info(f"Generated {TRADES_GENERATED.value} and sent {stats['completed']} trades so far at "
+                            f"{stats['achieved_rate']:.0f} trades per second (target {throughput}); in flight "
+                            f"{stats['queue_depth']}/{stats['max_queue']}, dropped {stats['dropped']} trades.")
+                last_log_time = now
+    finally:
+        await pipeline.close()
+        await producer.close()
+        stats = report_stats()
+        logger.info(f"Simulation ended. Total trades sent: {stats['completed']}")
+    return stats
@@ -0,0 +1,257 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional
+import numpy as np
+from tradeSimulator.config import Config
+from tradeSimulator.benchmark import synthetic_data
+from tradeSimulator.db_handler import DBHandler
+from tradeSimulator.db_pool import ConnectionPool
+from tradeSimulator.pipeline import BatchPipeline
+from tradeSimulator.producer import FileProducer, NullProducer, get_producer
+from tradeSimulator.simulator import load_data, make_generator
+from tradeSimulator.utils import ROW_COLUMNS, TokenBucket
+
+SINKS = ("null", "csv", "parquet", "sqlite", "db")
+
+def rss_mb() -> float:
+    """Current resident set size of this process in MiB."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        # peak RSS; kilobytes on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if platform.system() == "Darwin" else peak / 1024
+
+def cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+class StageRun:
+    """Collects trades, per-batch latencies, wall and CPU time for one measurement."""
+
+    def __init__(self, stage: str, **params):
+        self.stage = stage
+        self.params = params
+        self.trades = 0
+        self.latencies: List[float] = []
+        self._lock = threading.Lock()
+        self._wall = time.perf_counter()
+        self._cpu = cpu_seconds()
+
+    def record(self, trades: int, latency: Optional[float] = None):
+        with self._lock:
+            self.trades += trades
+            if latency is not None:
+                self.latencies.append(latency)
+
+    def result(self) -> dict:
+        elapsed = time.perf_counter() - self._wall
+        latencies = np.array(self.latencies)
+        return {
+            "stage": self.stage,
+            **self.params,
+            "trades": self.trades,
+            "seconds": round(elapsed, 4),
+            "trades_per_sec": round(self.trades / elapsed, 1) if elapsed > 0 else 0.0,
+            "p50_batch_ms": round(float(np.percentile(latencies, 50)) * 1000, 4) if latencies.size else None,
+            "p99_batch_ms": round(float(np.percentile(latencies, 99)) * 1000, 4) if latencies.size else None,
+            "cpu_percent": round((cpu_seconds() - self._cpu) / elapsed * 100, 1) if elapsed > 0 else 0.0,
+            "rss_mb": round(rss_mb(), 1),
+        }
+
+class TimedSink:
+    """Wraps a producer and records the latency of every produce_batch call."""
+
+    def __init__(self, producer, run: StageRun):
+        self.producer = producer
+        self.run = run
+
+    def produce_batch(self, trades):
+        start = time.perf_counter()
+        self.producer.produce_batch(trades)
+        self.run.record(len(trades), time.perf_counter() - start)
+
+    def close(self):
+        self.producer.close()
+
+class SQLiteProducer:
+    """DBHandler writing to a local SQLite file, as a stand-in for SingleStore."""
+
+    def __init__(self, path: str, insert_mode: str, pool_size: int):
+        conn = sqlite3.connect(path)
+        conn.execute(f"CREATE TABLE IF NOT EXISTS live_trades ({', '.join(ROW_COLUMNS)})")
+        conn.commit()
+        conn.close()
+        pool = ConnectionPool(
+            lambda: sqlite3.connect(path, timeout=30, check_same_thread=False),
+            max_size=pool_size,
+            recycle_on=(sqlite3.DatabaseError,),
+        )
+        self.db_handler = DBHandler(None, pool=pool, insert_mode=insert_mode, placeholder="?")
+
+    def produce_batch(self, trades):
+        self.db_handler.insert_trades(trades)
+
+    def close(self):
+        self.db_handler.close()
+
+def make_sink(kind: str, workdir: str, insert_mode: str, pool_size: int):
+    if kind == "null":
+        return NullProducer()
+    if kind == "csv":
+        return FileProducer(os.path.join(workdir, f"trades-{time.time_ns()}.csv"))
+    if kind == "parquet":
+        return FileProducer(os.path.join(workdir, f"trades-{time.time_ns()}.parquet"))
+    if kind == "sqlite":
+        return SQLiteProducer(os.path.join(workdir, "trades.sqlite"), insert_mode, pool_size)
+    if kind == "db":
+        return get_producer("db")
+    raise ValueError(f"Unsupported sink: {kind}")
+
+def bench_load_data(csv_path: str) -> dict:
+    os.environ["LOCAL_CSV_PATH"] = csv_path
+    run = StageRun("load_data", source=csv_path)
+    df = load_data()
+    run.record(len(df))
+    return run.result()
+
+def bench_generation(df, generator_kind: str, batch_size: int, seconds: float) -> dict:
+    os.environ["GENERATOR"] = generator_kind
+    generator = make_generator(df)
+    run = StageRun("generation", generator=generator_kind, batch_size=batch_size)
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        batch = generator.next_batch(batch_size)
+        run.record(len(batch), time.perf_counter() - start)
+    return run.result()
+
+def bench_rate_limiter(batch_size: int, threads: int, seconds: float) -> dict:
+    """Overhead of TokenBucket.acquire under contention, with a rate that never sleeps."""
+    bucket = TokenBucket(10**12, burst=10**12)
+    run = StageRun("rate_limiter", batch_size=batch_size, threads=threads)
+    deadline = time.perf_counter() + seconds
+
+    def spin():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            bucket.acquire(batch_size)
+            run.record(batch_size, time.perf_counter() - start)
+
+    workers = [threading.Thread(target=spin) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return run.result()
+
+def bench_insert(generator, sink_kind: str, insert_mode: str, batch_size: int, seconds: float, workdir: str) -> dict:
+    """produce_batch on a single thread, without the pipeline."""
+    run = StageRun("insert", sink=sink_kind, insert_mode=insert_mode, batch_size=batch_size)
+    sink = TimedSink(make_sink(sink_kind, workdir, insert_mode, pool_size=1), run)
+    deadline = time.perf_counter() + seconds
+    try:
+        while time.perf_counter() < deadline:
+            sink.produce_batch(generator.next_batch(batch_size))
+    finally:
+        sink.close()
+    return run.result()
+
+def bench_end_to_end(generator, sink_kind: str, insert_mode: str, batch_size: int, threads: int,
+                     seconds: float, workdir: str) -> dict:
+    """Generation, BatchPipeline and sink together, as in simulate_trades without rate limiting."""
+    run = StageRun("end_to_end", sink=sink_kind, insert_mode=insert_mode, batch_size=batch_size, threads=threads)
+    sink = TimedSink(make_sink(sink_kind, workdir, insert_mode, pool_size=threads), run)
+    pipeline = BatchPipeline(sink.produce_batch, num_workers=threads, max_queue=threads * 4)
+    deadline = time.perf_counter() + seconds
+    try:
+        while time.perf_counter() < deadline:
+            pipeline.submit(generator.next_batch(batch_size))
+    finally:
+        pipeline.close()
+        sink.close()
+    return run.result()
+
+def run_suite(args) -> dict:
+    results = []
+
+    def add(result: dict):
+        results.append(result)
+        print_result(result)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        csv_path = args.csv or Config.get_local_csv_path()
+        if not os.path.exists(csv_path):
+            csv_path = os.path.join(workdir, "synthetic_trades.csv")
+            synthetic_data(args.rows).to_csv(csv_path, index=False)
+        add(bench_load_data(csv_path))
+        df = load_data()
+
+        for generator_kind in args.generators:
+            for batch_size in args.batch_sizes:
+                add(bench_generation(df, generator_kind, batch_size, args.seconds))
+        for threads in args.threads:
+            add(bench_rate_limiter(args.batch_sizes[0], threads, args.seconds))
+
+        os.environ["GENERATOR"] = args.generators[0]
+        generator = make_generator(df)
+        for sink_kind in args.sinks:
+            modes = args.insert_modes if sink_kind in ("sqlite", "db") else ["-"]
+            for insert_mode in modes:
+                for batch_size in args.batch_sizes:
+                    add(bench_insert(
+                        generator, sink_kind, insert_mode, batch_size, args.seconds, workdir))
+                    for threads in args.threads:
+                        add(bench_end_to_end(
+                            generator, sink_kind, insert_mode, batch_size, threads, args.seconds, workdir))
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "seconds_per_run": args.seconds,
+        },
+        "results": results,
+    }
+
+def print_result(result: dict):
+    params = " ".join(f"{k}={v}" for k, v in result.items()
+                      if k in ("generator", "sink", "insert_mode", "batch_size", "threads"))
+    latency = ""
+    if result["p50_batch_ms"] is not None:
+        latency = f"p50={result['p50_batch_ms']}ms p99={result['p99_batch_ms']}ms "
+    print(f"{result['stage']:>12} {params:<60} {result['trades_per_sec']:>12,.0f} trades/s "
+          f"{latency}cpu={result['cpu_percent']}% rss={result['rss_mb']}MiB")
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage and end-to-end ingestion benchmark suite.")
+    parser.add_argument("--csv", help="source CSV (default LOCAL_CSV_PATH, synthetic data if missing)")
+    parser.add_argument("--rows", type=int, default=100_000, help="synthetic source rows")
+    parser.add_argument("--seconds", type=float, default=2.0, help="duration of each measurement")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--generators", nargs="+", default=["sample", "gbm"])
+    parser.add_argument("--sinks", nargs="+", choices=SINKS, default=["null", "csv", "sqlite"])
+    parser.add_argument("--insert-modes", nargs="+", choices=["executemany", "multirow"],
+                        default=["executemany", "multirow"], help="insert modes for the sqlite and db sinks")
+    parser.add_argument("--output", default="bench_results.json", help="JSON results file")
+    args = parser.parse_args()
+
+    report = run_suite(args)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(report['results'])} results to {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+import argparse
+import asyncio
+import os
+import time
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from tradeSimulator.config import Config
+from tradeSimulator.async_simulator import run_async_simulation
+from tradeSimulator.generator import TradeGenerator
+from tradeSimulator.pipeline import BatchPipeline
+from tradeSimulator.price_engine import PriceEngine
+from tradeSimulator.producer import get_producer
+from tradeSimulator.utils import TRADE_COLUMNS
+
+def synthetic_data(num_rows: int, seed: int = 0) -> pd.DataFrame:
+    """Trade-shaped source data for benchmarking when no CSV is available."""
+    rng = np.random.default_rng(seed)
+    tickers = np.array(["AAPL", "MSFT", "GOOGL", "AMZN", "NVDA", "META", "TSLA", "JPM"])
+    ts = 1_700_000_000_000_000_000 + np.arange(num_rows, dtype=np.int64) * 1_000_000
+    return pd.DataFrame({
+        "localTS": "", "localDate": "",
+        "ticker": tickers[rng.integers(0, len(tickers), num_rows)],
+        "conditions": "12,37", "correction": 0, "exchange": rng.integers(1, 20, num_rows),
+        "id": np.arange(num_rows).astype(str),
+        "participant_timestamp": ts,
+        "price": np.round(rng.uniform(10, 500, num_rows), 2),
+        "sequence_number": np.arange(num_rows, dtype=np.int64),
+        "sip_timestamp": ts,
+        "size": rng.integers(1, 500, num_rows),
+        "tape": rng.integers(1, 4, num_rows), "trf_id": 0, "trf_timestamp": ts,
+    })[TRADE_COLUMNS]
+
+def legacy_batch(df: pd.DataFrame, batch_size: int):
+    """The original per-batch DataFrame path of simulate_trades."""
+    batch = df.sample(n=batch_size, replace=True)
+    current_dt = datetime.now()
+    current_ts_ns = int(current_dt.timestamp() * 1_000_000_000)
+    batch['localTS'] = current_dt.strftime("%Y-%m-%d %H:%M:%S")
+    batch['localDate'] = current_dt.strftime("%Y-%m-%d")
+    batch['participant_timestamp'] = current_ts_ns
+    batch['sip_timestamp'] = current_ts_ns
+    batch['trf_timestamp'] = current_ts_ns
+    return batch.to_dict(orient='records')
+
+def measure(build_batch, batch_size: int, seconds: float) -> float:
+    """Call build_batch repeatedly for the given duration and return trades per second."""
+    trades = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while time.perf_counter() < deadline:
+        trades += len(build_batch(batch_size))
+    return trades / (time.perf_counter() - start)
+
+def bench_generation(df: pd.DataFrame, batch_size: int, seconds: float) -> dict:
+    generator = TradeGenerator(df, seed=0)
+    engine = PriceEngine(df, seed=0)
+    return {
+        "legacy": measure(lambda n: legacy_batch(df, n), batch_size, seconds),
+        "generator": measure(generator.next_batch, batch_size, seconds),
+        "gbm": measure(engine.next_batch, batch_size, seconds),
+    }
+
+class LatencySink:
+    """Stands in for the database by blocking for a fixed round-trip per batch."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def produce_batch(self, trades):
+        time.sleep(self.latency)
+
+    def close(self):
+        pass
+
+class AsyncLatencySink:
+    """asyncio version of LatencySink."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    async def start(self):
+        pass
+
+    async def produce_batch(self, trades):
+        await asyncio.sleep(self.latency)
+
+    async def close(self):
+        pass
+
+def bench_threaded(generator: TradeGenerator, producer, batch_size: int, num_threads: int, seconds: float) -> float:
+    pipeline = BatchPipeline(producer.produce_batch, num_workers=num_threads, max_queue=num_threads * 4)
+    start = time.perf_counter()
+    try:
+        while time.perf_counter() - start < seconds:
+            pipeline.submit(generator.next_batch(batch_size))
+    finally:
+        pipeline.close()
+        producer.close()
+    return pipeline.stats()["completed"] / (time.perf_counter() - start)
+
+def bench_async(generator: TradeGenerator, producer, batch_size: int, concurrency: int, seconds: float) -> float:
+    start = time.perf_counter()
+    stats = asyncio.run(run_async_simulation(
+        generator.next_batch, producer, throughput=10**12, batch_size=batch_size,
+        max_in_flight=concurrency, duration=seconds,
+    ))
+    return stats["completed"] / (time.perf_counter() - start)
+
+def load_source(rows: int):
+    csv_path = Config.get_local_csv_path()
+    if os.path.exists(csv_path):
+        df = pd.read_csv(csv_path)
+        for col in TRADE_COLUMNS:
+            if col not in df.columns:
+                df[col] = 0
+        return df, csv_path
+    return synthetic_data(rows), f"synthetic ({rows} rows)"
+
+def run_generation(args):
+    df, source = load_source(args.rows)
+    print(f"Source: {source}")
+    print(f"{'batch_size':>10} {'legacy trades/s':>16} {'generator trades/s':>19} {'speedup':>8} "
+          f"{'gbm trades/s':>13}")
+    for batch_size in args.batch_sizes:
+        result = bench_generation(df, batch_size, args.seconds)
+        print(f"{batch_size:>10} {result['legacy']:>16,.0f} {result['generator']:>19,.0f} "
+              f"{result['generator'] / result['legacy']:>7.1f}x {result['gbm']:>13,.0f}")
+
+def run_engines(args):
+    df, source = load_source(args.rows)
+    generator = TradeGenerator(df, seed=0)
+    sink = "SingleStore" if args.db else f"simulated {args.latency * 1000:.1f} ms round-trip"
+    print(f"Source: {source}; sink: {sink}")
+    print(f"{'engine':>8} {'workers':>8} {'trades/s':>12}")
+    for workers in args.workers:
+        threaded = get_producer("db") if args.db else LatencySink(args.latency)
+        rate = bench_threaded(generator, threaded, args.batch_size, workers, args.seconds)
+        print(f"{'threads':>8} {workers:>8} {rate:>12,.0f}")
+        in_flight = get_producer("async") if args.db else AsyncLatencySink(args.latency)
+        rate = bench_async(generator, in_flight, args.batch_size, workers, args.seconds)
+        print(f"{'asyncio':>8} {workers:>8} {rate:>12,.0f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Trade simulator benchmarks.")
+    parser.add_argument("--rows", type=int, default=100_000, help="synthetic source rows when no CSV is found")
+    parser.add_argument("--seconds", type=float, default=2.0, help="duration of each measurement")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    generation = subparsers.add_parser("generation", help="legacy DataFrame path vs TradeGenerator and PriceEngine")
+    generation.add_argument("--batch-sizes", type=int, nargs="+", default=[10, 100, 1000])
+    generation.set_defaults(func=run_generation)
+
+    engines = subparsers.add_parser("engines", help="ThreadPool pipeline vs asyncio engine")
+    engines.add_argument("--batch-size", type=int, default=Config.get_batch_size())
+    engines.add_argument("--workers", type=int, nargs="+", default=[8, 16, 64, 256],
+                         help="threads for the threaded engine, in-flight inserts for asyncio")
+    engines.add_argument("--latency", type=float, default=0.002, help="simulated seconds per insert")
+    engines.add_argument("--db", action="store_true", help="insert into SINGLESTORE_DB_URL instead")
+    engines.set_defaults(func=run_engines)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == '__main__':
+    main()
@@ -40,3 +40,135 @@ class Config:
     @staticmethod
     def get_batch_size():
         return int(os.getenv("BATCH_SIZE", "10"))
+
+    @staticmethod
+    def get_insert_mode():
+        return os.getenv("INSERT_MODE", "executemany")
+
+    @staticmethod
+    def get_insert_max_bytes():
+        return int(os.getenv("INSERT_MAX_BYTES", str(1024 * 1024)))
+
+    @staticmethod
+    def get_burst():
+        # trades the rate limiter admits without waiting; 0 means one batch
+        return int(os.getenv("BURST", "0"))
+
+    @staticmethod
+    def get_queue_size():
+        # batches waiting for an insert worker; 0 means four per worker thread
+        return int(os.getenv("QUEUE_SIZE", "0"))
+
+    @staticmethod
+    def get_backpressure_policy():
+        return os.getenv("BACKPRESSURE_POLICY", "block")
+
+    @staticmethod
+    def get_async_concurrency():
+        return int(os.getenv("ASYNC_CONCURRENCY", "64"))
+
+    @staticmethod
+    def get_num_processes():
+        return int(os.getenv("NUM_PROCESSES", "1"))
+
+    @staticmethod
+    def get_output_path():
+        return os.getenv("OUTPUT_PATH", "./simulated_trades.csv")
+
+    @staticmethod
+    def get_row_group_size():
+        return int(os.getenv("ROW_GROUP_SIZE", "100000"))
+
+    @staticmethod
+    def get_generator():
+        return os.getenv("GENERATOR", "sample")
+
+    @staticmethod
+    def get_seed():
+        seed = os.getenv("SEED")
+        return int(seed) if seed else None
+
+    @staticmethod
+    def get_sequence_start():
+        start = os.getenv("SEQUENCE_START")
+        return int(start) if start else None
+
+    @staticmethod
+    def get_metrics_port():
+        # 0 disables the Prometheus endpoint
+        return int(os.getenv("METRICS_PORT", "0"))
+
+    @staticmethod
+    def get_metrics_snapshot_path():
+        return os.getenv("METRICS_SNAPSHOT_PATH", "")
+
+    @staticmethod
+    def get_data_cache_enabled():
+        return os.getenv("DATA_CACHE", "true").lower() in ("1", "true", "yes")
+
+    @staticmethod
+    def get_data_cache_path():
+        # empty means "<LOCAL_CSV_PATH>.feather"
+        return os.getenv("DATA_CACHE_PATH", "")
+
+    @staticmethod
+    def get_replay_speed():
+        # 1 replays in real time, 10 ten times faster, 0 as fast as possible
+        return float(os.getenv("REPLAY_SPEED", "1"))
+
+    @staticmethod
+    def get_replay_chunk_size():
+        return int(os.getenv("REPLAY_CHUNK_SIZE", "100000"))
+
+    @staticmethod
+    def get_replay_loop():
+        return os.getenv("REPLAY_LOOP", "false").lower() in ("1", "true", "yes")
+
+    @staticmethod
+    def get_spool_dir():
+        # empty sends batches to the database directly
+        return os.getenv("SPOOL_DIR", "")
+
+    @staticmethod
+    def get_spool_segment_bytes():
+        return int(os.getenv("SPOOL_SEGMENT_BYTES", str(64 * 1024 * 1024)))
+
+    @staticmethod
+    def get_spool_drain_batch():
+        return int(os.getenv("SPOOL_DRAIN_BATCH", "50000"))
+
+    @staticmethod
+    def get_spool_fsync():
+        return os.getenv("SPOOL_FSYNC", "false").lower() in ("1", "true", "yes")
+
+    @staticmethod
+    def get_rollup_bars():
+        # maintain the one-second trade_bars_1s rollup while inserting trades
+        return os.getenv("ROLLUP_BARS", "false").lower() in ("1", "true", "yes")
+
+    @staticmethod
+    def get_portfolio_cache_ttl():
+        # seconds a user's optimized positions are served from memory; 0 disables the cache
+        return float(os.getenv("PORTFOLIO_CACHE_TTL", "300"))
+
+    @staticmethod
+    def get_retention_seconds():
+        # trades older than this are pruned from live_trades; 0 keeps everything
+        return float(os.getenv("RETENTION_SECONDS", "0"))
+
+    @staticmethod
+    def get_retention_chunk_size():
+        return int(os.getenv("RETENTION_CHUNK_SIZE", "10000"))
+
+    @staticmethod
+    def get_retention_chunk_pause():
+        return float(os.getenv("RETENTION_CHUNK_PAUSE", "0.5"))
+
+    @staticmethod
+    def get_retention_interval():
+        return float(os.getenv("RETENTION_INTERVAL", "60"))
+
+    @staticmethod
+    def get_retention_archive_dir():
+        # empty deletes old trades without exporting them
+        return os.getenv("RETENTION_ARCHIVE_DIR", "")
@@ -0,0 +1,118 @@
+import logging
+import os
+import time
+import pandas as pd
+from tradeSimulator.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Compact dtypes for the source columns. Low-cardinality text is categorical, numeric
+# columns use pandas' nullable types so missing values don't force float or object.
+# localTS and localDate are regenerated for every simulated trade and are not loaded.
+SOURCE_DTYPES = {
+    "ticker": "category",
+    "conditions": "category",
+    "correction": "Int8",
+    "exchange": "category",
+    "id": "string",
+    "participant_timestamp": "Int64",
+    "price": "float64",
+    "sequence_number": "Int64",
+    "sip_timestamp": "Int64",
+    "size": "Int32",
+    "tape": "category",
+    "trf_id": "category",
+    "trf_timestamp": "Int64",
+}
+
+def read_source_csv(path: str, **kwargs) -> pd.DataFrame:
+    """Read a trade CSV with SOURCE_DTYPES, skipping the columns the simulator regenerates."""
+    return pd.read_csv(
+        path,
+        usecols=lambda col: col in SOURCE_DTYPES,
+        dtype=SOURCE_DTYPES,
+        **kwargs,
+    )
+
+# categorical codes that are stored as integers in live_trades
+NUMERIC_CATEGORY_COLUMNS = ("exchange", "tape", "trf_id")
+
+def normalize_source(df: pd.DataFrame, warn: bool = True) -> pd.DataFrame:
+    for col in SOURCE_DTYPES:
+        if col not in df.columns:
+            df[col] = 0
+            if warn:
+                logger.warning(f"Column {col} not found in CSV. Created dummy column with default values.")
+    for col in NUMERIC_CATEGORY_COLUMNS:
+        if not isinstance(df[col].dtype, pd.CategoricalDtype):
+            continue
+        numeric = pd.to_numeric(df[col].cat.categories, errors="coerce")
+        if not numeric.isna().any() and (numeric == numeric.round()).all():
+            df[col] = df[col].cat.rename_categories(numeric.astype("int64"))
+    conditions = df["conditions"]
+    if not isinstance(conditions.dtype, pd.CategoricalDtype):
+        conditions = conditions.astype(str).astype("category")
+    if "" not in conditions.cat.categories:
+        conditions = conditions.cat.add_categories([""])
+    df["conditions"] = conditions.fillna("")
+    return df
+
+def cache_path_for(csv_path: str) -> str:
+    return Config.get_data_cache_path() or f"{csv_path}.feather"
+
+def _cache_is_fresh(cache_path: str, csv_path: str) -> bool:
+    if not os.path.exists(cache_path):
+        return False
+    return os.path.getmtime(cache_path) >= os.path.getmtime(csv_path)
+
+def _write_cache(df: pd.DataFrame, cache_path: str):
+    # uncompressed Arrow IPC can be memory-mapped; write aside and rename so
+    # concurrently starting processes never read a partial file
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        df.to_feather(tmp_path, compression="uncompressed")
+        os.replace(tmp_path, cache_path)
+    except (ImportError, OSError) as e:
+        logger.warning(f"Could not write source data cache {cache_path}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def _read_cache(cache_path: str) -> pd.DataFrame:
+    import pyarrow.feather
+    table = pyarrow.feather.read_table(cache_path, memory_map=True)
+    # split_blocks lets null-free numeric columns stay views on the mapped file
+    return table.to_pandas(split_blocks=True)
+
+def load_data() -> pd.DataFrame:
+    """
+    Load the source trades from LOCAL_CSV_PATH with compact dtypes.
+
+    The first load converts the CSV to an uncompressed Feather file next to it (or at
+    DATA_CACHE_PATH); later loads memory-map that file, so startup skips CSV parsing
+    and simulator processes on one machine share the page cache. The cache is rebuilt
+    whenever the CSV is newer. DATA_CACHE=false always reads the CSV.
+    """
+    csv_path = Config.get_local_csv_path()
+    start = time.perf_counter()
+    if not Config.get_data_cache_enabled():
+        df = normalize_source(read_source_csv(csv_path))
+    else:
+        cache_path = cache_path_for(csv_path)
+        if _cache_is_fresh(cache_path, csv_path):
+            try:
+                df = _read_cache(cache_path)
+                logger.info(f"Loaded {len(df)} source trades from {cache_path} in {time.perf_counter() - start:.2f}s.")
+                return df
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable source data cache {cache_path}: {e}")
+        df = normalize_source(read_source_csv(csv_path))
+        _write_cache(df, cache_path)
+    logger.info(f"Loaded {len(df)} source trades from {csv_path} in {time.perf_counter() - start:.2f}s.")
+    return df
+
+def count_tickers(path: str, chunk_size: int = 1_000_000) -> pd.Series:
+    """Trades per ticker, counted in chunks so the file is never held in memory."""
+    counts = pd.Series(dtype="int64")
+    for chunk in pd.read_csv(path, usecols=["ticker"], dtype={"ticker": "str"}, chunksize=chunk_size):
+        counts = counts.add(chunk["ticker"].value_counts(), fill_value=0)
+    return counts.astype("int64")
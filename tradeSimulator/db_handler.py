@@ -1,45 +1,278 @@
+import io
+import time
 import singlestoredb as s2
 import logging
-from typing import List, Dict, Any
+from typing import Iterator, List, Optional, Sequence, Tuple
 from tenacity import retry, wait_exponential, stop_after_attempt, retry_if_exception_type
 from singlestoredb import DatabaseError
 from tradeSimulator.config import Config
+from tradeSimulator.db_pool import ConnectionPool
+from tradeSimulator.metrics import REGISTRY
+from tradeSimulator.utils import ROW_COLUMNS
 
 logger = logging.getLogger(__name__)
 
+TABLE_NAME = "live_trades"
+
+CONNECT_SECONDS = REGISTRY.histogram("db_connect_seconds", "Time to obtain a pooled connection for an insert")
+EXECUTE_SECONDS = REGISTRY.histogram("db_execute_seconds", "Time to send one batch of inserts")
+COMMIT_SECONDS = REGISTRY.histogram("db_commit_seconds", "Time to commit one batch")
+TRADES_INSERTED = REGISTRY.counter("db_trades_inserted_total", "Trades committed to the database")
+INSERT_RETRIES = REGISTRY.counter("db_insert_retries_total", "insert_trades attempts retried after a DatabaseError")
+INSERT_ERRORS = REGISTRY.counter("db_insert_errors_total", "DatabaseErrors raised while inserting trades")
+
+# executemany: one parameterized statement per row, batched by the driver.
+# multirow:    INSERT ... VALUES (...),(...) statements capped at INSERT_MAX_BYTES.
+# load_data:   LOAD DATA LOCAL INFILE streamed from an in-memory TSV buffer (MySQL protocol only).
+INSERT_MODES = ("executemany", "multirow", "load_data")
+
+def insert_verb(ignore_duplicates: bool = False) -> str:
+    # IGNORE skips rows that collide with a unique key, so re-sent batches are idempotent
+    return "INSERT IGNORE INTO" if ignore_duplicates else "INSERT INTO"
+
+def _estimate_row_bytes(row: Sequence) -> int:
+    # value text plus quotes and separator per value, plus "(", ")" and ","
+    return sum(len(str(value)) + 3 for value in row) + 3
+
+def build_multirow_inserts(
+    rows: Sequence[Tuple],
+    max_bytes: int,
+    placeholder: str = "%s",
+    table: str = TABLE_NAME,
+    columns: Sequence[str] = ROW_COLUMNS,
+    ignore_duplicates: bool = False,
+) -> Iterator[Tuple[str, list]]:
+    """
+    Split rows into multi-row INSERT statements whose estimated size stays within max_bytes.
+
+    Yields (sql, params) pairs; params is the flattened row values for the statement's
+    placeholders. A single row larger than max_bytes still gets its own statement.
+    """
+    prefix = f"{insert_verb(ignore_duplicates)} {table} ({', '.join(columns)}) VALUES "
+    row_placeholders = f"({', '.join([placeholder] * len(columns))})"
+    chunk: List[Tuple] = []
+    chunk_bytes = len(prefix)
+    for row in rows:
+        row_bytes = _estimate_row_bytes(row)
+        if chunk and chunk_bytes + row_bytes > max_bytes:
+            yield prefix + ",".join([row_placeholders] * len(chunk)), [v for r in chunk for v in r]
+            chunk = []
+            chunk_bytes = len(prefix)
+        chunk.append(row)
+        chunk_bytes += row_bytes
+    if chunk:
+        yield prefix + ",".join([row_placeholders] * len(chunk)), [v for r in chunk for v in r]
+
+def _tsv_field(value) -> str:
+    if value is None:
+        return "\\N"
+    if isinstance(value, str):
+        return value.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n")
+    return str(value)
+
+def rows_to_tsv(rows: Sequence[Tuple]) -> bytes:
+    """Encode rows in the default LOAD DATA format: tab-separated, backslash-escaped, \\N for NULL."""
+    return "".join("\t".join(map(_tsv_field, row)) + "\n" for row in rows).encode("utf-8")
+
+def build_load_data_query(
+    table: str = TABLE_NAME, columns: Sequence[str] = ROW_COLUMNS, ignore_duplicates: bool = False
+) -> str:
+    return (
+        f"LOAD DATA LOCAL INFILE ':stream:' {'IGNORE ' if ignore_duplicates else ''}INTO TABLE {table} "
+        "FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' "
+        f"({', '.join(columns)})"
+    )
+
+BARS_TABLE = "trade_bars_1s"
+BAR_NS = 1_000_000_000
+
+_TICKER = ROW_COLUMNS.index("ticker")
+_PRICE = ROW_COLUMNS.index("price")
+_SIZE = ROW_COLUMNS.index("size")
+_TIMESTAMP = ROW_COLUMNS.index("participant_timestamp")
+_ID = ROW_COLUMNS.index("id")
+
+# Additive upsert of one-second bars. Every update commutes, so batches may be applied
+# in any order and by concurrent writers; open/close follow the earliest/latest trade
+# time. Assignments run left to right, so open and close are set before their times.
+BAR_UPSERT_QUERY = (
+    f"INSERT INTO {BARS_TABLE} "
+    "(ticker, bucket_ns, open, open_ts, high, low, close, close_ts, volume, notional, trades) "
+    "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s) "
+    "ON DUPLICATE KEY UPDATE "
+    "open = IF(VALUES(open_ts) < open_ts, VALUES(open), open), "
+    "open_ts = LEAST(open_ts, VALUES(open_ts)), "
+    "high = GREATEST(high, VALUES(high)), "
+    "low = LEAST(low, VALUES(low)), "
+    "close = IF(VALUES(close_ts) >= close_ts, VALUES(close), close), "
+    "close_ts = GREATEST(close_ts, VALUES(close_ts)), "
+    "volume = volume + VALUES(volume), "
+    "notional = notional + VALUES(notional), "
+    "trades = trades + VALUES(trades)"
+)
+
+def bar_deltas(rows: Sequence[Tuple]) -> List[Tuple]:
+    """
+    Per (ticker, second) OHLCV contributions of a batch, as BAR_UPSERT_QUERY parameters.
+
+    Rows without a price or participant_timestamp are skipped. The result is sorted by
+    key so concurrent transactions lock bars in the same order.
+    """
+    bars = {}
+    for row in rows:
+        price, ts = row[_PRICE], row[_TIMESTAMP]
+        if price is None or ts is None:
+            continue
+        size = row[_SIZE] or 0
+        key = (row[_TICKER], ts // BAR_NS * BAR_NS)
+        bar = bars.get(key)
+        if bar is None:
+            bars[key] = [price, ts, price, price, price, ts, size, price * size, 1]
+            continue
+        if ts < bar[1]:
+            bar[0], bar[1] = price, ts
+        if price > bar[2]:
+            bar[2] = price
+        if price < bar[3]:
+            bar[3] = price
+        if ts >= bar[5]:
+            bar[4], bar[5] = price, ts
+        bar[6] += size
+        bar[7] += price * size
+        bar[8] += 1
+    return [key + tuple(bars[key]) for key in sorted(bars)]
+
+def build_bar_rebuild_query(where: str) -> str:
+    """REPLACE the one-second bars of the live_trades rows matching where with freshly aggregated ones."""
+    return (
+        f"REPLACE INTO {BARS_TABLE} "
+        "(ticker, bucket_ns, open, open_ts, high, low, close, close_ts, volume, notional, trades) "
+        f"SELECT ticker, participant_timestamp DIV {BAR_NS} * {BAR_NS} AS bucket_ns, "
+        "FIRST(price, participant_timestamp), MIN(participant_timestamp), MAX(price), MIN(price), "
+        "LAST(price, participant_timestamp), MAX(participant_timestamp), SUM(size), SUM(price * size), COUNT(*) "
+        f"FROM {TABLE_NAME} WHERE {where} GROUP BY ticker, bucket_ns"
+    )
+
+def build_stored_keys_query(tickers: int, ids: int, placeholder: str = "%s") -> str:
+    """SELECT the (ticker, id) unique keys already in live_trades among the given tickers and ids."""
+    return (
+        f"SELECT ticker, id FROM {TABLE_NAME} "
+        f"WHERE ticker IN ({', '.join([placeholder] * tickers)}) AND id IN ({', '.join([placeholder] * ids)})"
+    )
+
+class DuplicateInsertRace(DatabaseError):
+    """A trade was stored by another writer between checking for and inserting a batch's new trades."""
+
 class DBHandler:
-    def __init__(self, db_url: str):
-        self.db_url = db_url
+    def __init__(
+        self,
+        db_url: Optional[str],
+        pool: Optional[ConnectionPool] = None,
+        insert_mode: Optional[str] = None,
+        max_statement_bytes: Optional[int] = None,
+        placeholder: str = "%s",
+        ignore_duplicates: bool = False,
+        rollup_bars: Optional[bool] = None,
+    ):
+        """
+        insert_mode defaults to INSERT_MODE and max_statement_bytes to INSERT_MAX_BYTES.
+        Pass a pool and placeholder="?" to run against a DB-API stand-in such as sqlite3;
+        load_data needs a MySQL-protocol connection. ignore_duplicates skips rows whose
+        unique key already exists, for callers that may send a batch more than once.
+        rollup_bars (default ROLLUP_BARS) also folds every batch into the one-second bar
+        table in the same transaction. With both, only the trades not stored yet are
+        inserted and folded in, so a re-sent batch never counts a trade twice.
+        """
+        self.insert_mode = insert_mode or Config.get_insert_mode()
+        if self.insert_mode not in INSERT_MODES:
+            raise ValueError(f"Unsupported insert mode: {self.insert_mode}")
+        self.max_statement_bytes = max_statement_bytes or Config.get_insert_max_bytes()
+        self.placeholder = placeholder
+        self.ignore_duplicates = ignore_duplicates
+        self.rollup_bars = Config.get_rollup_bars() if rollup_bars is None else rollup_bars
+        # Remove "+pymysql" from the protocol for singlestoredb
+        self.db_url = db_url.replace("mysql+pymysql", "mysql") if db_url else None
+        connect_kwargs = {"local_infile": True} if self.insert_mode == "load_data" else {}
+        # Shared by all simulator worker threads; a connection that raised DatabaseError
+        # is dropped so the tenacity retry below starts over on a fresh one.
+        self.pool = pool or ConnectionPool(
+            lambda: s2.connect(self.db_url, **connect_kwargs),
+            max_size=Config.get_db_pool_size(),
+            recycle_on=(DatabaseError,),
+        )
+        # NOTE: We no longer include the new auto-increment primary key 'trade_id'.
+        self.insert_query = (
+            f"{insert_verb(ignore_duplicates)} {TABLE_NAME} ({', '.join(ROW_COLUMNS)}) "
+            f"VALUES ({', '.join([placeholder] * len(ROW_COLUMNS))})"
+        )
+        self.load_data_query = build_load_data_query(ignore_duplicates=ignore_duplicates)
+
+    def _new_trades(self, cur, trades: List[Tuple]) -> List[Tuple]:
+        """The trades whose (ticker, id) is not in live_trades yet, each key once."""
+        tickers = sorted({row[_TICKER] for row in trades})
+        ids = sorted({row[_ID] for row in trades})
+        cur.execute(build_stored_keys_query(len(tickers), len(ids), self.placeholder), [*tickers, *ids])
+        stored = {tuple(key) for key in cur.fetchall()}
+        new = {}
+        for row in trades:
+            key = (row[_TICKER], row[_ID])
+            if key not in stored and key not in new:
+                new[key] = row
+        return list(new.values())
+
+    def _write(self, cur, trades: List[Tuple]):
+        if self.rollup_bars and self.ignore_duplicates:
+            # the batch may be a re-send: insert and count only the trades not stored yet
+            trades = self._new_trades(cur, trades)
+            if not trades:
+                return
+        if self.insert_mode == "executemany":
+            cur.executemany(self.insert_query, trades)
+            inserted = cur.rowcount
+        elif self.insert_mode == "multirow":
+            inserted = 0
+            for sql, params in build_multirow_inserts(
+                    trades, self.max_statement_bytes, self.placeholder, ignore_duplicates=self.ignore_duplicates
+            ):
+                cur.execute(sql, params)
+                inserted += cur.rowcount
+        else:
+            cur.execute(self.load_data_query, infile_stream=io.BytesIO(rows_to_tsv(trades)))
+            inserted = cur.rowcount
+        if self.rollup_bars:
+            if self.ignore_duplicates and inserted != len(trades):
+                # a concurrent writer stored one of them after _new_trades; the retry sees it
+                raise DuplicateInsertRace(f"{len(trades) - inserted} of {len(trades)} new trades were already stored")
+            cur.executemany(BAR_UPSERT_QUERY, bar_deltas(trades))
 
     @retry(
         stop=stop_after_attempt(5),
         wait=wait_exponential(multiplier=1, min=1, max=5),
-        retry=retry_if_exception_type(DatabaseError)
+        retry=retry_if_exception_type(DatabaseError),
+        before_sleep=lambda retry_state: INSERT_RETRIES.inc()
     )
-    def insert_trades(self, trades: List[Dict[str, Any]]):
+    def insert_trades(self, trades: List[Tuple]):
+        """Insert row tuples laid out in ROW_COLUMNS order as one transaction."""
         if not trades:
             return
 
-        # NOTE: We no longer include the new auto-increment primary key 'trade_id'.
-        insert_query = """
-        INSERT INTO live_trades
-        (localTS, localDate, ticker, conditions, correction, exchange, id, participant_timestamp, price,
-         sequence_number, sip_timestamp, size, tape, trf_id, trf_timestamp)
-        VALUES (%(localTS)s, %(localDate)s, %(ticker)s, %(conditions)s, %(correction)s, %(exchange)s, %(id)s,
-                %(participant_timestamp)s, %(price)s, %(sequence_number)s, %(sip_timestamp)s, %(size)s,
-                %(tape)s, %(trf_id)s, %(trf_timestamp)s)
-        """
-        # Remove "+pymysql" from the protocol for singlestoredb
-        clean_url = self.db_url.replace("mysql+pymysql", "mysql")
-        conn = s2.connect(clean_url)
-        cur = conn.cursor()
-        try:
-            cur.executemany(insert_query, trades)
-            conn.commit()
-            logger.debug(f"Inserted {len(trades)} trades into the database.")
-        except DatabaseError as e:
-            logger.error(f"Database error inserting trades: {e}")
-            raise
-        finally:
-            cur.close()
-            conn.close()
+        start = time.perf_counter()
+        with self.pool.connection() as conn:
+            CONNECT_SECONDS.observe(time.perf_counter() - start)
+            cur = conn.cursor()
+            try:
+                with EXECUTE_SECONDS.time():
+                    self._write(cur, trades)
+                with COMMIT_SECONDS.time():
+                    conn.commit()
+                TRADES_INSERTED.inc(len(trades))
+                logger.debug(f"Inserted {len(trades)} trades into the database ({self.insert_mode}).")
+            except DatabaseError as e:
+                INSERT_ERRORS.inc()
+                logger.error(f"Database error inserting trades: {e}")
+                raise
+            finally:
+                cur.close()
+
+    def close(self):
+        self.pool.close()
@@ -0,0 +1,124 @@
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Tuple, Type
+from tradeSimulator.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+CONNECTIONS_OPENED = REGISTRY.counter("db_connections_opened_total", "Connections opened by connection pools")
+CONNECTIONS_DISCARDED = REGISTRY.counter("db_connections_discarded_total", "Pooled connections closed as unhealthy or failed")
+
+class PoolTimeoutError(Exception):
+    pass
+
+class ConnectionPool:
+    """
+    Thread-safe, bounded pool of DB-API connections.
+
+    At most max_size connections exist at once; callers block in acquire() until one
+    is free. Idle connections are health-checked before reuse once they have been
+    idle longer than health_check_interval, and connections that raised one of the
+    recycle_on exceptions are closed instead of being returned to the pool.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        max_size: int,
+        recycle_on: Tuple[Type[BaseException], ...] = (Exception,),
+        health_check_interval: float = 30.0,
+        acquire_timeout: float = 30.0,
+    ):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self._connect = connect
+        self.max_size = max_size
+        self.recycle_on = recycle_on
+        self.health_check_interval = health_check_interval
+        self.acquire_timeout = acquire_timeout
+        self._slots = threading.BoundedSemaphore(max_size)
+        # LIFO keeps a small set of connections hot and lets the rest age out
+        self._idle = queue.LifoQueue()
+        self._closed = False
+
+    def _is_healthy(self, conn) -> bool:
+        try:
+            cur = conn.cursor()
+            try:
+                cur.execute("SELECT 1")
+                cur.fetchall()
+            finally:
+                cur.close()
+            return True
+        except Exception:
+            return False
+
+    def _close_quietly(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def acquire(self):
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise PoolTimeoutError(f"No connection available within {self.acquire_timeout}s")
+        try:
+            while True:
+                try:
+                    conn, last_used = self._idle.get_nowait()
+                except queue.Empty:
+                    CONNECTIONS_OPENED.inc()
+                    return self._connect()
+                if time.monotonic() - last_used < self.health_check_interval or self._is_healthy(conn):
+                    return conn
+                logger.debug("Discarding unhealthy pooled connection.")
+                CONNECTIONS_DISCARDED.inc()
+                self._close_quietly(conn)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, conn, discard: bool = False):
+        try:
+            if discard or self._closed:
+                if discard:
+                    CONNECTIONS_DISCARDED.inc()
+                self._close_quietly(conn)
+            else:
+                self._idle.put((conn, time.monotonic()))
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        except self.recycle_on:
+            self.release(conn, discard=True)
+            raise
+        except BaseException:
+            # non-database failure: keep the connection if it can be reset cleanly
+            discard = False
+            try:
+                conn.rollback()
+            except Exception:
+                discard = True
+            self.release(conn, discard=discard)
+            raise
+        else:
+            self.release(conn)
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._close_quietly(conn)
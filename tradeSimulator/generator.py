@@ -0,0 +1,154 @@
+import time
+from abc import ABC, abstractmethod
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from typing import List, Optional, Tuple
+from tradeSimulator.utils import ROW_COLUMNS, TIMESTAMP_COLUMNS
+
+SOURCE_COLUMNS = ROW_COLUMNS[:-len(TIMESTAMP_COLUMNS)]
+SEQUENCE_INDEX = SOURCE_COLUMNS.index("sequence_number")
+ID_INDEX = SOURCE_COLUMNS.index("id")
+
+def timestamp_tail(current_dt: datetime) -> Tuple:
+    """Values for TIMESTAMP_COLUMNS, in order, for a batch generated at current_dt."""
+    current_ts_ns = int(current_dt.timestamp() * 1_000_000_000)
+    return (
+        current_dt.strftime("%Y-%m-%d %H:%M:%S"),
+        current_dt.strftime("%Y-%m-%d"),
+        current_ts_ns,
+        current_ts_ns,
+        current_ts_ns,
+    )
+
+def group_ranks(codes: np.ndarray, num_groups: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Position of each element among the elements with the same code, in array order.
+
+    Returns (ranks, counts) where counts[g] is the number of elements with code g.
+    """
+    counts = np.bincount(codes, minlength=num_groups)
+    order = np.argsort(codes, kind="stable")
+    ranks = np.empty(len(codes), dtype=np.int64)
+    ranks[order] = np.arange(len(codes)) - (np.cumsum(counts) - counts)[codes[order]]
+    return ranks, counts
+
+class SourceColumn:
+    """
+    One source column kept in its compact typed form.
+
+    Categorical and text columns are held as integer codes into an object array of
+    their distinct values, numeric columns as a NumPy array (a view on the memory-mapped
+    cache when possible) plus a missing-value mask. take() converts only the drawn rows
+    into driver-ready Python values, with None for missing ones.
+    """
+
+    def __init__(self, series: pd.Series):
+        self.mask = None
+        if not isinstance(series.dtype, pd.CategoricalDtype) and series.dtype.kind not in "biuf":
+            series = series.astype("category")
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            categories = series.cat.categories.astype(object).to_numpy()
+            # code -1 (missing) indexes the trailing None
+            self.values = np.append(categories, None)
+            self.codes = series.cat.codes.to_numpy()
+            return
+        self.codes = None
+        dtype = getattr(series.dtype, "numpy_dtype", series.dtype)
+        missing = series.isna().to_numpy()
+        if missing.any():
+            self.mask = missing
+            self.values = series.to_numpy(dtype=dtype, na_value=0)
+        else:
+            self.values = series.to_numpy(dtype=dtype)
+
+    def take(self, rows: np.ndarray) -> list:
+        if self.codes is not None:
+            return self.values[self.codes[rows]].tolist()
+        values = self.values[rows].tolist()
+        if self.mask is not None:
+            for i in np.flatnonzero(self.mask[rows]):
+                values[i] = None
+        return values
+
+def source_columns(df: pd.DataFrame) -> List[SourceColumn]:
+    return [SourceColumn(df[col]) for col in SOURCE_COLUMNS]
+
+class BlockGenerator(ABC):
+    """
+    Base class for trade generators that build rows in large blocks.
+
+    Subclasses implement _build_block(size), returning tuples of SOURCE_COLUMNS;
+    next_batch() slices the current block and appends the timestamp tuple, so rows
+    follow ROW_COLUMNS order.
+    """
+
+    # True for generators that schedule their own trades, see pacing_delay()
+    paced = False
+
+    def __init__(self, block_size: int = 65536):
+        self.block_size = block_size
+        self._block: List[Tuple] = []
+        self._pos = 0
+
+    @abstractmethod
+    def _build_block(self, size: int) -> List[Tuple]:
+        ...
+
+    def next_batch(self, batch_size: int, current_dt: Optional[datetime] = None) -> List[Tuple]:
+        if self._pos + batch_size > len(self._block):
+            self._block = self._build_block(max(self.block_size, batch_size))
+            self._pos = 0
+        rows = self._block[self._pos:self._pos + batch_size]
+        self._pos += batch_size
+        tail = timestamp_tail(current_dt or datetime.now())
+        return [row + tail for row in rows]
+
+    def pacing_delay(self) -> float:
+        """Seconds to wait before sending the last batch; negative when it is overdue."""
+        return 0.0
+
+class TradeGenerator(BlockGenerator):
+    """
+    Produces insert-ready trade rows by resampling the source data.
+
+    The source DataFrame is kept as typed per-column arrays. Row indices are
+    drawn with NumPy in large blocks and materialized as tuples of the source
+    columns, so each batch only slices the block and appends the timestamp tuple.
+
+    sequence_number is reassigned per ticker, continuing from the highest value in the
+    source or from sequence_start (default: the current time in microseconds), whichever
+    is larger, so it increases monotonically within each ticker across restarts. id is
+    the sequence number as text, which keeps (ticker, id) unique.
+    """
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        block_size: int = 65536,
+        seed: Optional[int] = None,
+        sequence_start: Optional[int] = None,
+    ):
+        if df.empty:
+            raise ValueError("Cannot generate trades from empty source data")
+        super().__init__(block_size)
+        self.columns = source_columns(df)
+        self.num_rows = len(df)
+        self.ticker_codes, tickers = pd.factorize(df["ticker"])
+        source_seq = pd.to_numeric(df["sequence_number"], errors="coerce").fillna(0).to_numpy(dtype=np.int64)
+        self.next_sequence = np.zeros(len(tickers), dtype=np.int64)
+        np.maximum.at(self.next_sequence, self.ticker_codes, source_seq)
+        start = sequence_start if sequence_start is not None else time.time_ns() // 1000
+        self.next_sequence = np.maximum(self.next_sequence + 1, start)
+        self.rng = np.random.default_rng(seed)
+
+    def _build_block(self, size: int) -> List[Tuple]:
+        idx = self.rng.integers(0, self.num_rows, size=size)
+        codes = self.ticker_codes[idx]
+        ranks, counts = group_ranks(codes, len(self.next_sequence))
+        values = [col.take(idx) for col in self.columns]
+        sequence = self.next_sequence[codes] + ranks
+        values[SEQUENCE_INDEX] = sequence.tolist()
+        values[ID_INDEX] = sequence.astype(str).tolist()
+        self.next_sequence += counts
+        return list(zip(*values))
@@ -0,0 +1,225 @@
+import json
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+from tradeSimulator.config import Config
+
+logger = logging.getLogger(__name__)
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self):
+        return self._value
+
+    def snapshot(self):
+        return self._value
+
+    def exposition(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter", f"{self.name} {self._value}"]
+
+class Gauge:
+    """A value that is set directly, or read from a function at collection time."""
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._value = 0.0
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float):
+        self._value = value
+
+    def set_function(self, function: Callable[[], float]):
+        self._function = function
+
+    @property
+    def value(self):
+        return self._function() if self._function else self._value
+
+    def snapshot(self):
+        return self.value
+
+    def exposition(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge", f"{self.name} {self.value}"]
+
+class Histogram:
+    """
+    Log-bucketed latency histogram in the spirit of HdrHistogram.
+
+    Bucket bounds grow by 2 ** (1 / buckets_per_doubling) from lowest to highest, so
+    observe() is O(1) and percentiles have a bounded relative error (about 9% with the
+    default 8 buckets per doubling) regardless of the value range. Values are seconds.
+    """
+
+    def __init__(self, name: str, help: str, lowest: float = 1e-6, highest: float = 100.0,
+                 buckets_per_doubling: int = 8):
+        self.name = name
+        self.help = help
+        self.lowest = lowest
+        self.buckets_per_doubling = buckets_per_doubling
+        self._log_ratio = math.log(2) / buckets_per_doubling
+        num_bounds = math.ceil(math.log(highest / lowest) / self._log_ratio) + 1
+        self.bounds = [lowest * math.exp(self._log_ratio * i) for i in range(num_bounds)]
+        # one count per bound plus an overflow bucket
+        self._counts = [0] * (num_bounds + 1)
+        self._count = 0
+        self._sum = 0.0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        if value <= self.lowest:
+            index = 0
+        else:
+            index = min(len(self.bounds), math.ceil(math.log(value / self.lowest) / self._log_ratio - 1e-9))
+        with self._lock:
+            self._counts[index] += 1
+            self._count += 1
+            self._sum += value
+            if value > self._max:
+                self._max = value
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th percentile (0-100)."""
+        with self._lock:
+            counts, total, maximum = list(self._counts), self._count, self._max
+        if total == 0:
+            return 0.0
+        target = max(1, math.ceil(total * q / 100))
+        seen = 0
+        for index, count in enumerate(counts):
+            seen += count
+            if seen >= target:
+                return min(self.bounds[index], maximum) if index < len(self.bounds) else maximum
+        return maximum
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self._count,
+            "sum": self._sum,
+            "max": self._max,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "p999": self.percentile(99.9),
+        }
+
+    def exposition(self) -> List[str]:
+        with self._lock:
+            counts, total, total_sum = list(self._counts), self._count, self._sum
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        cumulative = 0
+        for index, bound in enumerate(self.bounds):
+            cumulative += counts[index]
+            # one le bucket per doubling keeps the exposition small; cumulative counts stay exact
+            if index % self.buckets_per_doubling == 0:
+                lines.append(f'{self.name}_bucket{{le="{bound:.6g}"}} {cumulative}')
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {total}')
+        lines.append(f"{self.name}_sum {total_sum}")
+        lines.append(f"{self.name}_count {total}")
+        return lines
+
+class Registry:
+    """Process-wide collection of metrics, created on first use by name."""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name: str, help: str, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, **kwargs)
+            return metric
+
+    def counter(self, name: str, help: str) -> Counter:
+        return self._get(Counter, name, help)
+
+    def gauge(self, name: str, help: str) -> Gauge:
+        return self._get(Gauge, name, help)
+
+    def histogram(self, name: str, help: str, **kwargs) -> Histogram:
+        return self._get(Histogram, name, help, **kwargs)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.snapshot() for metric in metrics}
+
+    def exposition(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(line for metric in metrics for line in metric.exposition()) + "\n"
+
+REGISTRY = Registry()
+
+def start_http_server(port: int, registry: Registry = REGISTRY) -> ThreadingHTTPServer:
+    """Serve the Prometheus text format on http://0.0.0.0:port/metrics from a daemon thread."""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.exposition().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("0.0.0.0", port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logger.info(f"Serving metrics on port {port}.")
+    return server
+
+def start_snapshot_writer(path: str, interval: float, registry: Registry = REGISTRY) -> threading.Thread:
+    """Rewrite a JSON snapshot of the registry to path every interval seconds from a daemon thread."""
+
+    def write_loop():
+        while True:
+            time.sleep(interval)
+            snapshot = {"timestamp": time.time(), "metrics": registry.snapshot()}
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(snapshot, f)
+            # readers never see a partially written file
+            os.replace(tmp_path, path)
+
+    thread = threading.Thread(target=write_loop, name="metrics-snapshot", daemon=True)
+    thread.start()
+    return thread
+
+def start_exporters():
+    """Start the exporters enabled by METRICS_PORT and METRICS_SNAPSHOT_PATH."""
+    if Config.get_metrics_port():
+        start_http_server(Config.get_metrics_port())
+    if Config.get_metrics_snapshot_path():
+        start_snapshot_writer(Config.get_metrics_snapshot_path(), Config.get_log_interval())
@@ -0,0 +1,114 @@
+import logging
+import queue
+import threading
+from typing import Callable, List, Optional
+from tradeSimulator.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+BACKPRESSURE_POLICIES = ("block", "drop")
+
+_STOP = object()
+
+TRADES_GENERATED = REGISTRY.counter("sim_trades_generated_total", "Trades generated, counted before rate limiting")
+RATE_LIMIT_WAIT_SECONDS = REGISTRY.histogram("sim_rate_limit_wait_seconds", "Time the generator slept in the rate limiter")
+TRADES_SENT = REGISTRY.counter("sim_trades_sent_total", "Trades whose batch was sent successfully")
+TRADES_DROPPED = REGISTRY.counter("sim_trades_dropped_total", "Trades dropped by the drop backpressure policy")
+BATCHES_FAILED = REGISTRY.counter("sim_batches_failed_total", "Batches whose send raised an exception")
+QUEUE_DEPTH = REGISTRY.gauge("sim_queue_depth", "Batches waiting for an insert worker")
+
+class BatchPipeline:
+    """
+    Bounded producer/consumer pipeline between batch generation and insert workers.
+
+    submit() places a batch on a queue of at most max_queue batches that num_workers
+    threads drain through send. When the queue is full, the "block" policy makes the
+    generator wait for a free slot and the "drop" policy discards the batch and counts
+    its trades as dropped. Workers report completions through callbacks, so stats()
+    never scans outstanding work. The first send failure is re-raised from the next
+    submit() so a dead database still stops the simulation.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[list], None],
+        num_workers: int,
+        max_queue: int,
+        policy: str = "block",
+        on_complete: Optional[Callable[[int], None]] = None,
+    ):
+        if policy not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"Unsupported backpressure policy: {policy}")
+        self.send = send
+        self.policy = policy
+        self.max_queue = max_queue
+        self._queue = queue.Queue(maxsize=max_queue)
+        QUEUE_DEPTH.set_function(self._queue.qsize)
+        self._callbacks: List[Callable[[int], None]] = [self._count_completed]
+        if on_complete:
+            self._callbacks.append(on_complete)
+        self._lock = threading.Lock()
+        self._completed = 0
+        self._dropped = 0
+        self._error: Optional[BaseException] = None
+        self._workers = [
+            threading.Thread(target=self._work, name=f"batch-worker-{i}", daemon=True)
+            for i in range(num_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def _count_completed(self, trades: int):
+        with self._lock:
+            self._completed += trades
+        TRADES_SENT.inc(trades)
+
+    def _work(self):
+        while True:
+            batch = self._queue.get()
+            try:
+                if batch is _STOP:
+                    return
+                self.send(batch)
+                for callback in self._callbacks:
+                    callback(len(batch))
+            except Exception as e:
+                logger.error(f"Failed to send batch of {len(batch)} trades: {e}")
+                BATCHES_FAILED.inc()
+                with self._lock:
+                    if self._error is None:
+                        self._error = e
+            finally:
+                self._queue.task_done()
+
+    def submit(self, batch: list) -> bool:
+        """Queue a batch for sending. Returns False if it was dropped."""
+        if self._error is not None:
+            raise self._error
+        if self.policy == "block":
+            self._queue.put(batch)
+            return True
+        try:
+            self._queue.put_nowait(batch)
+            return True
+        except queue.Full:
+            with self._lock:
+                self._dropped += len(batch)
+            TRADES_DROPPED.inc(len(batch))
+            return False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "completed": self._completed,
+                "dropped": self._dropped,
+                "queue_depth": self._queue.qsize(),
+                "max_queue": self.max_queue,
+            }
+
+    def close(self):
+        """Send the queued batches, then stop the workers."""
+        for _ in self._workers:
+            self._queue.put(_STOP)
+        for worker in self._workers:
+            worker.join()
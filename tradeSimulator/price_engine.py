@@ -0,0 +1,151 @@
+import time
+import numpy as np
+import pandas as pd
+from typing import List, Optional, Tuple
+from tradeSimulator.generator import BlockGenerator, SOURCE_COLUMNS, group_ranks, source_columns
+
+PRICE_MODELS = ("gbm", "mean_reverting")
+
+# Fallbacks for tickers with too little history to estimate from
+DEFAULT_RETURN_VOL = 0.0005
+DEFAULT_SIZE_SIGMA = 1.0
+MAX_RETURN_VOL = 0.01
+
+def ticker_statistics(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per-ticker model parameters estimated from historical trades.
+
+    Columns: weight (share of trades), last_price, mean_price, return_vol (std of
+    trade-to-trade log returns), size_mu and size_sigma (log-normal trade size).
+    """
+    trades = pd.DataFrame({
+        "ticker": df["ticker"].astype(str),
+        "ts": pd.to_numeric(df["participant_timestamp"], errors="coerce"),
+        "price": pd.to_numeric(df["price"], errors="coerce"),
+        "log_size": np.log(pd.to_numeric(df["size"], errors="coerce").clip(lower=1)),
+    }).dropna(subset=["price"])
+    trades = trades[trades["price"] > 0].sort_values(["ticker", "ts"], kind="stable")
+    trades["log_return"] = np.log(trades["price"]).groupby(trades["ticker"]).diff()
+    grouped = trades.groupby("ticker", sort=True)
+    stats = pd.DataFrame({
+        "weight": grouped.size(),
+        "last_price": grouped["price"].last(),
+        "mean_price": grouped["price"].mean(),
+        "return_vol": grouped["log_return"].std(),
+        "size_mu": grouped["log_size"].mean(),
+        "size_sigma": grouped["log_size"].std(),
+    })
+    stats["weight"] = stats["weight"] / stats["weight"].sum()
+    stats["return_vol"] = stats["return_vol"].fillna(DEFAULT_RETURN_VOL).clip(1e-6, MAX_RETURN_VOL)
+    stats["size_mu"] = stats["size_mu"].fillna(0.0)
+    stats["size_sigma"] = stats["size_sigma"].fillna(DEFAULT_SIZE_SIGMA)
+    return stats
+
+class PriceEngine(BlockGenerator):
+    """
+    Synthesizes trades from per-ticker stochastic price processes.
+
+    Tickers are drawn in proportion to their historical trade counts. Each ticker's
+    log price follows a random walk with its historical per-trade volatility: "gbm" is
+    a driftless geometric Brownian motion, "mean_reverting" pulls the price back toward
+    the historical mean by `reversion` of the gap per block. Trade sizes are
+    log-normal per ticker. The remaining columns (conditions, exchange, tape, ...) come
+    from a random historical trade of the same ticker.
+
+    Whole blocks are generated with NumPy, and price paths continue across blocks.
+    sequence_number increases per ticker from sequence_start, and id is the sequence
+    number as text. With a seed the whole output is deterministic: sequence_start
+    defaults to 1, so a re-run into the same table needs a different sequence_start.
+    Without one it defaults to the current time in microseconds, which only keeps ids
+    unique across runs.
+    """
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        model: str = "gbm",
+        seed: Optional[int] = None,
+        block_size: int = 65536,
+        reversion: float = 0.05,
+        sequence_start: Optional[int] = None,
+    ):
+        if model not in PRICE_MODELS:
+            raise ValueError(f"Unsupported price model: {model}")
+        super().__init__(block_size)
+        self.model = model
+        self.reversion = reversion
+        self.rng = np.random.default_rng(seed)
+
+        stats = ticker_statistics(df)
+        if stats.empty:
+            raise ValueError("Cannot estimate price models from empty source data")
+        self.tickers = stats.index.to_numpy()
+        self.weights = stats["weight"].to_numpy()
+        self.log_price = np.log(stats["last_price"].to_numpy())
+        self.log_mean = np.log(stats["mean_price"].to_numpy())
+        self.return_vol = stats["return_vol"].to_numpy()
+        self.size_mu = stats["size_mu"].to_numpy()
+        self.size_sigma = stats["size_sigma"].to_numpy()
+        if sequence_start is not None:
+            start = sequence_start
+        else:
+            start = 1 if seed is not None else time.time_ns() // 1000
+        self.next_sequence = np.full(len(self.tickers), start, dtype=np.int64)
+
+        # historical rows grouped by ticker, to draw the descriptive columns from
+        codes = pd.Categorical(df["ticker"].astype(str), categories=self.tickers).codes
+        keep = codes >= 0
+        order = np.argsort(codes[keep], kind="stable")
+        self.source_rows = np.flatnonzero(keep)[order]
+        row_counts = np.bincount(codes[keep], minlength=len(self.tickers))
+        self.row_offsets = np.cumsum(row_counts) - row_counts
+        self.row_counts = row_counts
+        self.columns = source_columns(df)
+        self.price_index = SOURCE_COLUMNS.index("price")
+        self.size_index = SOURCE_COLUMNS.index("size")
+        self.id_index = SOURCE_COLUMNS.index("id")
+        self.sequence_index = SOURCE_COLUMNS.index("sequence_number")
+        self.ticker_index = SOURCE_COLUMNS.index("ticker")
+
+    def _price_paths(self, codes: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        """Log prices for the block, continuing each ticker's path in array order."""
+        sigma = self.return_vol[codes]
+        steps = sigma * self.rng.standard_normal(len(codes)) - 0.5 * sigma ** 2
+        if self.model == "mean_reverting":
+            gap = self.reversion * (self.log_mean - self.log_price)
+            steps += (gap / np.maximum(counts, 1))[codes]
+        # cumulative sum per ticker: sort by (ticker, rank), cumsum, subtract each group's offset
+        order = np.argsort(codes, kind="stable")
+        cumulative = np.cumsum(steps[order])
+        group_end = np.cumsum(counts)
+        before_group = np.concatenate(([0.0], cumulative))[group_end - counts]
+        path = np.empty(len(codes))
+        path[order] = cumulative - before_group[codes[order]]
+        log_prices = self.log_price[codes] + path
+        self.log_price += np.concatenate(([0.0], cumulative))[group_end] - before_group
+        return log_prices
+
+    def _build_block(self, size: int) -> List[Tuple]:
+        num_tickers = len(self.tickers)
+        codes = self.rng.choice(num_tickers, size=size, p=self.weights)
+        ranks, counts = group_ranks(codes, num_tickers)
+
+        prices = np.exp(self._price_paths(codes, counts))
+        prices = np.where(prices < 1.0, np.round(prices, 4), np.round(prices, 2))
+        sizes = np.maximum(1, np.rint(np.exp(
+            self.size_mu[codes] + self.size_sigma[codes] * self.rng.standard_normal(size)
+        ))).astype(np.int64)
+        sequence = self.next_sequence[codes] + ranks
+        self.next_sequence += counts
+        # a random historical trade of the same ticker supplies the descriptive columns
+        rows = self.source_rows[
+            self.row_offsets[codes] + (self.rng.random(size) * self.row_counts[codes]).astype(np.int64)
+        ]
+
+        values = [col.take(rows) for col in self.columns]
+        values[self.ticker_index] = self.tickers[codes].tolist()
+        values[self.price_index] = prices.tolist()
+        values[self.size_index] = sizes.tolist()
+        values[self.sequence_index] = sequence.tolist()
+        values[self.id_index] = sequence.astype(str).tolist()
+        return list(zip(*values))
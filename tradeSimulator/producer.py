@@ -1,18 +1,157 @@
+import csv
+import logging
+import os
+import threading
 from tradeSimulator.db_handler import DBHandler
 from tradeSimulator.config import Config
+from tradeSimulator.metrics import REGISTRY
+from tradeSimulator.utils import ROW_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+PRODUCE_SECONDS = REGISTRY.histogram("producer_batch_seconds", "DBProducer.produce_batch latency, including retries")
+
+# Arrow types of ROW_COLUMNS for the columnar file formats
+ARROW_TYPES = {
+    "localTS": "string", "localDate": "string", "ticker": "string", "conditions": "string",
+    "correction": "int64", "exchange": "int64", "id": "string", "participant_timestamp": "int64",
+    "price": "float64", "sequence_number": "int64", "sip_timestamp": "int64", "size": "int64",
+    "tape": "int64", "trf_id": "int64", "trf_timestamp": "int64",
+}
 
 class DBProducer:
-    def __init__(self, db_url):
-        self.db_handler = DBHandler(db_url)
+    """
+    Sends batches to live_trades through DBHandler.
+
+    With SPOOL_DIR set, batches are appended to a local Spool instead and a background
+    thread drains them into the database, so a slow or unavailable database never
+    blocks or stops generation. Spooled inserts skip duplicate trades, since a batch
+    may be sent twice after a crash.
+    """
+
+    def __init__(self, db_url, spool_dir=None):
+        spool_dir = spool_dir if spool_dir is not None else Config.get_spool_dir()
+        self.db_handler = DBHandler(db_url, ignore_duplicates=bool(spool_dir))
+        self.spool = None
+        if spool_dir:
+            from tradeSimulator.spool import Spool
+            self.spool = Spool(
+                spool_dir,
+                self.db_handler.insert_trades,
+                segment_bytes=Config.get_spool_segment_bytes(),
+                drain_batch=Config.get_spool_drain_batch(),
+                fsync=Config.get_spool_fsync(),
+            )
+
+    def produce_batch(self, trades):
+        with PRODUCE_SECONDS.time():
+            if self.spool:
+                self.spool.append(trades)
+            else:
+                self.db_handler.insert_trades(trades)
+
+    def close(self):
+        if self.spool:
+            self.spool.close()
+        self.db_handler.close()
+
+class NullProducer:
+    """Discards batches and only counts them, to measure generation on its own."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.trades = 0
+
+    def produce_batch(self, trades):
+        with self._lock:
+            self.batches += 1
+            self.trades += len(trades)
+
+    def close(self):
+        logger.info(f"Null producer received {self.trades} trades in {self.batches} batches.")
+
+class FileProducer:
+    """
+    Appends batches to a local file instead of the database.
+
+    The format follows the file extension: .parquet and .arrow/.feather (Arrow IPC
+    file, i.e. Feather v2, readable with pyarrow.feather.read_table) buffer rows and
+    write one row group / record batch per row_group_size rows; anything else is
+    written as CSV, appending to an existing file. Columnar formats need pyarrow and
+    start a new file on every run.
+    """
+
+    def __init__(self, path: str, row_group_size: int = 100_000):
+        self.path = path
+        self.row_group_size = row_group_size
+        self.format = {
+            ".parquet": "parquet", ".arrow": "arrow", ".feather": "arrow"
+        }.get(os.path.splitext(path)[1].lower(), "csv")
+        self._lock = threading.Lock()
+        self._buffer = []
+        self.trades = 0
+        if self.format == "csv":
+            write_header = not os.path.exists(path) or os.path.getsize(path) == 0
+            self._file = open(path, "a", newline="", buffering=1024 * 1024)
+            self._csv = csv.writer(self._file)
+            if write_header:
+                self._csv.writerow(ROW_COLUMNS)
+        else:
+            import pyarrow as pa
+            import pyarrow.ipc
+            import pyarrow.parquet
+            self._pa = pa
+            self._schema = pa.schema([(col, ARROW_TYPES[col]) for col in ROW_COLUMNS])
+            if self.format == "parquet":
+                self._writer = pa.parquet.ParquetWriter(path, self._schema)
+            else:
+                self._writer = pa.ipc.new_file(path, self._schema)
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        pa = self._pa
+        columns = zip(*self._buffer)
+        batch = pa.record_batch(
+            [pa.array(values, type=field.type) for values, field in zip(columns, self._schema)],
+            schema=self._schema,
+        )
+        if self.format == "parquet":
+            self._writer.write_batch(batch, row_group_size=len(self._buffer))
+        else:
+            self._writer.write_batch(batch)
+        self._buffer = []
 
     def produce_batch(self, trades):
-        self.db_handler.insert_trades(trades)
+        with self._lock:
+            self.trades += len(trades)
+            if self.format == "csv":
+                self._csv.writerows(trades)
+                return
+            self._buffer.extend(trades)
+            if len(self._buffer) >= self.row_group_size:
+                self._flush()
 
     def close(self):
-        pass
+        with self._lock:
+            if self.format == "csv":
+                self._file.close()
+            else:
+                self._flush()
+                self._writer.close()
+        logger.info(f"File producer wrote {self.trades} trades to {self.path}.")
 
 def get_producer(mode):
     if mode == "db":
         return DBProducer(Config.get_singlestore_db_url())
+    elif mode == "async":
+        # aiomysql is only needed for the asyncio engine
+        from tradeSimulator.async_producer import AsyncDBProducer
+        return AsyncDBProducer(Config.get_singlestore_db_url())
+    elif mode == "file":
+        return FileProducer(Config.get_output_path(), Config.get_row_group_size())
+    elif mode == "null":
+        return NullProducer()
     else:
         raise ValueError("Unsupported mode")
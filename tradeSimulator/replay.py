@@ -0,0 +1,166 @@
+import logging
+import time
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from typing import Collection, Iterator, List, Optional, Tuple
+from tradeSimulator.data_loader import normalize_source, read_source_csv
+from tradeSimulator.generator import BlockGenerator, ID_INDEX, source_columns
+from tradeSimulator.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+REPLAY_LAG_SECONDS = REGISTRY.gauge("sim_replay_lag_seconds", "How far the replay is behind the trades' scheduled times")
+
+# rewritten per trade; localTS and localDate still come from the batch time
+REPLAY_TIMESTAMP_COLUMNS = ("participant_timestamp", "sip_timestamp", "trf_timestamp")
+
+NO_TIMESTAMP = np.iinfo(np.int64).min
+
+class ReplayGenerator(BlockGenerator):
+    """
+    Replays a trade tape in its original order, paced against the wall clock.
+
+    The file is streamed in chunks of chunk_size rows, so memory stays flat however
+    large it is. The tape time of a trade is its sip_timestamp (participant_timestamp
+    when missing), clamped to be non-decreasing. A trade with tape time t is due at
+    start + (t - t0) / speed, where t0 is the first trade's tape time and start the wall
+    clock when replay began; its timestamp columns are rewritten with the same mapping,
+    so gaps between trades and between a trade's own timestamps shrink by `speed`.
+    speed=0 replays as fast as possible and only shifts timestamps to the present.
+
+    next_batch() never sleeps: it returns the next trades due within max_span seconds
+    of each other, and pacing_delay() tells the caller how long to wait before sending
+    them. With loop=True the file restarts from the beginning when it ends; otherwise
+    next_batch() returns an empty list.
+
+    Every run sends the tape's trades again, so trade ids get a "-<run_id>-<pass>"
+    suffix to keep (ticker, id) unique in live_trades. run_id defaults to the start
+    time in base-36 microseconds, so restarts and concurrent per-session simulators do
+    not collide; pass a fixed one to reproduce a run's ids.
+    """
+
+    paced = True
+
+    def __init__(
+        self,
+        path: str,
+        speed: float = 1.0,
+        chunk_size: int = 100_000,
+        tickers: Optional[Collection[str]] = None,
+        loop: bool = False,
+        max_span: float = 0.1,
+        run_id: Optional[str] = None,
+    ):
+        if speed < 0:
+            raise ValueError("speed must be positive, or 0 for maximum speed")
+        super().__init__(chunk_size)
+        self.path = path
+        self.speed = speed
+        self.chunk_size = chunk_size
+        self.tickers = set(tickers) if tickers is not None else None
+        self.loop = loop
+        self.max_span = max_span
+        self.run_id = run_id if run_id is not None else np.base_repr(time.time_ns() // 1000, 36).lower()
+        self._pass = 0
+        self._chunks = self._read_chunks()
+        self._tape_start: Optional[int] = None
+        self._wall_start_ns = 0
+        self._last_tape_ts: Optional[int] = None
+        self._due = np.empty(0)
+        self._stamps: List[Tuple] = []
+        self._next_due = 0.0
+
+    def _read_chunks(self) -> Iterator[pd.DataFrame]:
+        passes = 0
+        while True:
+            found = False
+            for i, chunk in enumerate(read_source_csv(self.path, chunksize=self.chunk_size)):
+                if self.tickers is not None:
+                    chunk = chunk[chunk["ticker"].isin(self.tickers)]
+                if chunk.empty:
+                    continue
+                found = True
+                self._pass = passes
+                yield normalize_source(chunk.reset_index(drop=True), warn=passes == 0 and i == 0)
+            passes += 1
+            if not self.loop or not found:
+                return
+            logger.info(f"Replay reached the end of {self.path}; starting over.")
+            # the next pass is scheduled from now, so rewritten timestamps keep increasing
+            self._tape_start = None
+            self._last_tape_ts = None
+
+    def _map(self, tape_ts: np.ndarray) -> np.ndarray:
+        """Wall-clock nanoseconds for tape-time nanoseconds."""
+        offsets = tape_ts - self._tape_start
+        if self.speed and self.speed != 1:
+            offsets = (offsets / self.speed).astype(np.int64)
+        return self._wall_start_ns + offsets
+
+    def _build_block(self, size: int) -> List[Tuple]:
+        """Source rows of the next chunk holding timed trades, scheduled; [] at the end of the tape."""
+        for chunk in self._chunks:
+            rows = self._schedule(chunk)
+            if rows:
+                return rows
+        return []
+
+    def _schedule(self, chunk: pd.DataFrame) -> List[Tuple]:
+        """Source rows of chunk's timed trades; sets their due times and rewritten timestamps."""
+        timestamps, present = {}, {}
+        for col in REPLAY_TIMESTAMP_COLUMNS:
+            values = chunk[col].astype("Int64")
+            timestamps[col] = values.to_numpy(dtype=np.int64, na_value=0)
+            present[col] = timestamps[col] > 0
+        tape = np.where(present["sip_timestamp"], timestamps["sip_timestamp"], timestamps["participant_timestamp"])
+        # running maximum: out-of-order trades and trades without a timestamp keep the previous time
+        tape = np.where(present["sip_timestamp"] | present["participant_timestamp"], tape, NO_TIMESTAMP)
+        if self._last_tape_ts is not None:
+            tape[0] = max(tape[0], self._last_tape_ts)
+        tape = np.maximum.accumulate(tape)
+        valid = tape != NO_TIMESTAMP
+        if not valid.any():
+            return []
+        tape = tape[valid]
+        if self._tape_start is None:
+            self._tape_start = int(tape[0])
+            self._wall_start_ns = time.time_ns()
+        self._last_tape_ts = int(tape[-1])
+
+        rows = np.flatnonzero(valid)
+        self._due = self._map(tape) / 1e9
+        columns = [col.take(rows) for col in source_columns(chunk)]
+        suffix = f"-{self.run_id}-{self._pass}"
+        columns[ID_INDEX] = [f"{value}{suffix}" for value in columns[ID_INDEX]]
+        mapped = []
+        for col in REPLAY_TIMESTAMP_COLUMNS:
+            ok = present[col][valid]
+            rewritten = self._map(np.where(ok, timestamps[col][valid], self._tape_start))
+            mapped.append([v if keep else None for v, keep in zip(rewritten.tolist(), ok.tolist())])
+        self._stamps = list(zip(*mapped))
+        return list(zip(*columns))
+
+    def next_batch(self, batch_size: int, current_dt: Optional[datetime] = None) -> List[Tuple]:
+        if self._pos >= len(self._block):
+            self._block = self._build_block(self.chunk_size)
+            self._pos = 0
+            if not self._block:
+                return []
+        start = self._pos
+        end = min(start + batch_size, len(self._block))
+        if self.speed:
+            end = min(end, int(np.searchsorted(self._due, self._due[start] + self.max_span, side="right")))
+        self._pos = end
+        self._next_due = float(self._due[end - 1]) if self.speed else 0.0
+        current_dt = current_dt or datetime.now()
+        local = (current_dt.strftime("%Y-%m-%d %H:%M:%S"), current_dt.strftime("%Y-%m-%d"))
+        return [source + local + stamps
+                for source, stamps in zip(self._block[start:end], self._stamps[start:end])]
+
+    def pacing_delay(self) -> float:
+        if not self.speed:
+            return 0.0
+        delay = self._next_due - time.time()
+        REPLAY_LAG_SECONDS.set(max(0.0, -delay))
+        return delay
@@ -0,0 +1,181 @@
+import argparse
+import logging
+import os
+import threading
+import time
+from typing import Optional
+import singlestoredb as s2
+from tradeSimulator.config import Config
+from tradeSimulator.db_handler import TABLE_NAME
+from tradeSimulator.db_pool import ConnectionPool
+from tradeSimulator.logger_config import setup_logging
+from tradeSimulator.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+RETENTION_ROWS_PRUNED = REGISTRY.counter("retention_rows_pruned_total", "Trades deleted by the retention manager")
+RETENTION_ROWS_ARCHIVED = REGISTRY.counter("retention_rows_archived_total", "Trades exported to Parquet before deletion")
+RETENTION_CHUNK_SECONDS = REGISTRY.histogram("retention_chunk_seconds", "Time to archive and delete one chunk")
+RETENTION_SWEEP_SECONDS = REGISTRY.histogram("retention_sweep_seconds", "Time for one full retention sweep, pauses included")
+
+class RetentionManager:
+    """
+    Deletes trades older than retention_seconds from live_trades.
+
+    Every interval seconds a sweep deletes trades whose participant_timestamp is before
+    the cutoff, chunk_size rows per transaction with chunk_pause seconds between chunks,
+    so pruning never holds long locks or competes with inserts for long. With
+    archive_dir set each chunk is first written to a Parquet file named after its
+    trade_id range and only that range is deleted; a chunk whose delete fails
+    is exported again under the same name by the next sweep. Parquet export needs
+    pandas and pyarrow.
+    """
+
+    def __init__(
+        self,
+        db_url: Optional[str],
+        retention_seconds: float,
+        chunk_size: int = 10_000,
+        chunk_pause: float = 0.5,
+        interval: float = 60.0,
+        archive_dir: str = "",
+        pool: Optional[ConnectionPool] = None,
+        placeholder: str = "%s",
+        table: str = TABLE_NAME,
+    ):
+        if retention_seconds <= 0:
+            raise ValueError("retention_seconds must be positive")
+        self.retention_seconds = retention_seconds
+        self.chunk_size = chunk_size
+        self.chunk_pause = chunk_pause
+        self.interval = interval
+        self.archive_dir = archive_dir
+        self.placeholder = placeholder
+        self.table = table
+        if archive_dir:
+            os.makedirs(archive_dir, exist_ok=True)
+        db_url = db_url.replace("mysql+pymysql", "mysql") if db_url else None
+        self.pool = pool or ConnectionPool(
+            lambda: s2.connect(db_url), max_size=1, recycle_on=(s2.OperationalError, s2.InterfaceError)
+        )
+        self._stop = threading.Event()
+        self._thread = None
+
+    def cutoff(self) -> int:
+        return time.time_ns() - int(self.retention_seconds * 1_000_000_000)
+
+    def _delete_chunk(self, cur, cutoff: int) -> int:
+        p = self.placeholder
+        cur.execute(f"DELETE FROM {self.table} WHERE participant_timestamp < {p} LIMIT {p}", (cutoff, self.chunk_size))
+        return cur.rowcount
+
+    def _archive_chunk(self, cur, cutoff: int) -> int:
+        import pandas as pd
+        p = self.placeholder
+        cur.execute(
+            f"SELECT * FROM {self.table} WHERE participant_timestamp < {p} ORDER BY trade_id LIMIT {p}",
+            (cutoff, self.chunk_size),
+        )
+        rows = cur.fetchall()
+        if not rows:
+            return 0
+        df = pd.DataFrame(rows, columns=[desc[0] for desc in cur.description])
+        first, last = int(df["trade_id"].iloc[0]), int(df["trade_id"].iloc[-1])
+        path = os.path.join(self.archive_dir, f"{self.table}-{first:012d}-{last:012d}.parquet")
+        df.to_parquet(f"{path}.tmp", index=False)
+        os.replace(f"{path}.tmp", path)
+        RETENTION_ROWS_ARCHIVED.inc(len(df))
+        # the exported range: every old row with first <= trade_id <= last was selected above
+        cur.execute(
+            f"DELETE FROM {self.table} WHERE trade_id BETWEEN {p} AND {p} AND participant_timestamp < {p}",
+            (first, last, cutoff),
+        )
+        return cur.rowcount
+
+    def prune_chunk(self, cutoff: int) -> int:
+        """Delete (and optionally archive) one chunk of trades older than cutoff; returns rows deleted."""
+        with RETENTION_CHUNK_SECONDS.time():
+            with self.pool.connection() as conn:
+                cur = conn.cursor()
+                try:
+                    if self.archive_dir:
+                        deleted = self._archive_chunk(cur, cutoff)
+                    else:
+                        deleted = self._delete_chunk(cur, cutoff)
+                finally:
+                    cur.close()
+                conn.commit()
+        RETENTION_ROWS_PRUNED.inc(deleted)
+        return deleted
+
+    def sweep(self) -> int:
+        """Prune everything older than the current cutoff; returns rows deleted."""
+        cutoff = self.cutoff()
+        total = 0
+        with RETENTION_SWEEP_SECONDS.time():
+            while not self._stop.is_set():
+                deleted = self.prune_chunk(cutoff)
+                total += deleted
+                if deleted < self.chunk_size:
+                    break
+                self._stop.wait(self.chunk_pause)
+        if total:
+            logger.info(f"Retention pruned {total} trades older than {self.retention_seconds:.0f}s from {self.table}.")
+        return total
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.warning(f"Retention sweep failed, retrying in {self.interval:.0f}s: {e}")
+            self._stop.wait(self.interval)
+
+    def start(self) -> "RetentionManager":
+        self._thread = threading.Thread(target=self._run, name="retention", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self, timeout: float = 30.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.pool.close()
+
+def start_retention() -> Optional[RetentionManager]:
+    """Start a RetentionManager in the background if RETENTION_SECONDS is set."""
+    retention_seconds = Config.get_retention_seconds()
+    if retention_seconds <= 0:
+        return None
+    logger.info(f"Pruning trades older than {retention_seconds:.0f}s every {Config.get_retention_interval():.0f}s.")
+    return RetentionManager(
+        Config.get_singlestore_db_url(),
+        retention_seconds,
+        chunk_size=Config.get_retention_chunk_size(),
+        chunk_pause=Config.get_retention_chunk_pause(),
+        interval=Config.get_retention_interval(),
+        archive_dir=Config.get_retention_archive_dir(),
+    ).start()
+
+def main():
+    parser = argparse.ArgumentParser(description="Prune (and optionally archive) old trades from live_trades.")
+    parser.add_argument("--retention-seconds", type=float, default=Config.get_retention_seconds())
+    parser.add_argument("--chunk-size", type=int, default=Config.get_retention_chunk_size())
+    parser.add_argument("--chunk-pause", type=float, default=Config.get_retention_chunk_pause())
+    parser.add_argument("--archive-dir", default=Config.get_retention_archive_dir())
+    args = parser.parse_args()
+    setup_logging()
+    manager = RetentionManager(
+        Config.get_singlestore_db_url(),
+        args.retention_seconds,
+        chunk_size=args.chunk_size,
+        chunk_pause=args.chunk_pause,
+        archive_dir=args.archive_dir,
+    )
+    try:
+        manager.sweep()
+    finally:
+        manager.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import time
+from typing import Dict, List
+import pandas as pd
+from tradeSimulator.config import Config
+from tradeSimulator.data_loader import count_tickers, load_data
+from tradeSimulator.logger_config import setup_logging
+
+logger = logging.getLogger(__name__)
+
+def partition_tickers(ticker_counts: Dict[str, int], num_partitions: int) -> List[List[str]]:
+    """
+    Split tickers into num_partitions disjoint sets with balanced row counts.
+
+    Greedy longest-processing-time assignment: the busiest tickers are placed first,
+    each on the currently lightest partition. The result is deterministic for a given
+    source file.
+    """
+    partitions = [[] for _ in range(num_partitions)]
+    loads = [0] * num_partitions
+    for ticker, count in sorted(ticker_counts.items(), key=lambda item: (-item[1], item[0])):
+        target = loads.index(min(loads))
+        partitions[target].append(ticker)
+        loads[target] += count
+    return partitions
+
+def _worker_main(worker_id, tickers, throughput, mode, batch_size, num_threads, stop_event, stats_queue):
+    # the parent owns shutdown: Ctrl-C reaches it, and it sets stop_event for everyone
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    setup_logging()
+    if mode == "file":
+        # one output file per worker
+        root, ext = os.path.splitext(Config.get_output_path())
+        os.environ["OUTPUT_PATH"] = f"{root}-{worker_id}{ext}"
+    if Config.get_spool_dir():
+        # a spool directory belongs to one process
+        os.environ["SPOOL_DIR"] = os.path.join(Config.get_spool_dir(), f"worker-{worker_id}")
+    if Config.get_metrics_port():
+        # the parent keeps METRICS_PORT; each worker serves its own registry on the next ports
+        os.environ["METRICS_PORT"] = str(Config.get_metrics_port() + 1 + worker_id)
+    if Config.get_metrics_snapshot_path():
+        root, ext = os.path.splitext(Config.get_metrics_snapshot_path())
+        os.environ["METRICS_SNAPSHOT_PATH"] = f"{root}-{worker_id}{ext}"
+    if Config.get_seed() is not None:
+        # distinct but reproducible random streams per worker
+        os.environ["SEED"] = str(Config.get_seed() + worker_id)
+    from tradeSimulator.metrics import start_exporters
+    from tradeSimulator.simulator import simulate_trades
+    start_exporters()
+    simulate_trades(
+        throughput=throughput,
+        mode=mode,
+        batch_size=batch_size,
+        num_threads=num_threads,
+        tickers=tickers,
+        stop_event=stop_event,
+        report=lambda stats: stats_queue.put((worker_id, stats)),
+    )
+
+def run_sharded(num_processes: int, throughput: int, mode: str, batch_size: int, num_threads: int):
+    """
+    Run the simulator in num_processes worker processes that each own a disjoint set of tickers.
+
+    Each worker gets the share of throughput that matches its share of source rows, so
+    the ticker mix of the combined feed follows the source and load is spread evenly
+    over the ticker shard key. The parent logs aggregated stats and stops all workers
+    on Ctrl-C or when any worker fails.
+    """
+    if Config.get_generator() == "replay":
+        counts = count_tickers(Config.get_local_csv_path())
+    else:
+        # also builds the source data cache once, before the workers memory-map it
+        counts = load_data()["ticker"].value_counts()
+        counts = pd.Series(counts.to_numpy(), index=counts.index.astype(str))
+        counts = counts[counts > 0]
+    num_processes = min(num_processes, len(counts))
+    partitions = partition_tickers(counts.to_dict(), num_processes)
+    total_rows = int(counts.sum())
+
+    stop_event = multiprocessing.Event()
+    stats_queue = multiprocessing.Queue()
+    latest: Dict[int, dict] = {}
+    workers = []
+    for worker_id, tickers in enumerate(partitions):
+        share = int(counts[tickers].sum()) / total_rows
+        worker_rate = max(1, round(throughput * share))
+        logger.info(f"Worker {worker_id}: {len(tickers)} tickers, {worker_rate} trades per second.")
+        process = multiprocessing.Process(
+            target=_worker_main,
+            args=(worker_id, tickers, worker_rate, mode, batch_size, num_threads, stop_event, stats_queue),
+            name=f"simulator-{worker_id}",
+        )
+        process.start()
+        workers.append(process)
+
+    def drain_stats(timeout: float):
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                worker_id, stats = stats_queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                return
+            latest[worker_id] = stats
+
+    def log_totals(prefix: str):
+        completed = sum(stats["completed"] for stats in latest.values())
+        dropped = sum(stats["dropped"] for stats in latest.values())
+        rate = sum(stats["achieved_rate"] for stats in latest.values())
+        logger.info(f"{prefix}: {completed} trades sent by {len(latest)}/{len(workers)} workers at "
+                    f"{rate:.0f} trades per second (target {throughput}), dropped {dropped} trades.")
+
+    try:
+        # a worker that finishes cleanly (end of a replay) leaves the others running
+        while any(process.is_alive() for process in workers):
+            drain_stats(Config.get_log_interval())
+            log_totals("Cluster")
+            if any(process.exitcode not in (None, 0) for process in workers):
+                break
+        failed = [process.name for process in workers if process.exitcode not in (None, 0)]
+        if failed:
+            logger.error(f"Worker(s) {', '.join(failed)} exited unexpectedly; stopping all workers.")
+    except KeyboardInterrupt:
+        logger.info("Stopping simulation due to keyboard interrupt.")
+    finally:
+        stop_event.set()
+        for process in workers:
+            # workers finish their queued batches before exiting
+            while process.is_alive():
+                drain_stats(0.5)
+                process.join(timeout=0.5)
+        drain_stats(0.1)
+        log_totals("Simulation ended")
@@ -1,90 +1,164 @@
+import asyncio
 import logging
+import multiprocessing
 import pandas as pd
 import time
-from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Collection, Optional
+from tradeSimulator.async_simulator import run_async_simulation
 from tradeSimulator.config import Config
+from tradeSimulator.data_loader import load_data
 from tradeSimulator.logger_config import setup_logging
+from tradeSimulator.generator import BlockGenerator, TradeGenerator
+from tradeSimulator.metrics import start_exporters
+from tradeSimulator.pipeline import BatchPipeline, RATE_LIMIT_WAIT_SECONDS, TRADES_GENERATED
+from tradeSimulator.price_engine import PRICE_MODELS, PriceEngine
 from tradeSimulator.producer import get_producer
-from tradeSimulator.utils import RateLimiter
+from tradeSimulator.replay import ReplayGenerator
+from tradeSimulator.retention import start_retention
+from tradeSimulator.utils import TokenBucket
 from tenacity import retry, wait_exponential, stop_after_attempt
 import random
 
 logger = logging.getLogger(__name__)
 
-def load_data() -> pd.DataFrame:
-    df = pd.read_csv(Config.get_local_csv_path())
-    required_cols = [
-        "localTS", "localDate", "ticker", "conditions", "correction", "exchange",
-        "id", "participant_timestamp", "price", "sequence_number", "sip_timestamp",
-        "size", "tape", "trf_id", "trf_timestamp"
-    ]
-    for col in required_cols:
-        if col not in df.columns:
-            df[col] = 0
-            logger.warning(f"Column {col} not found in CSV. Created dummy column with default values.")
-    df['conditions'] = df['conditions'].fillna('')
-    df['conditions'] = df['conditions'].astype(str)
-    return df
+def make_generator(df: pd.DataFrame) -> BlockGenerator:
+    """Build the trade generator selected by GENERATOR: "sample" or one of PRICE_MODELS."""
+    kind = Config.get_generator()
+    if kind == "sample":
+        return TradeGenerator(df, seed=Config.get_seed(), sequence_start=Config.get_sequence_start())
+    if kind in PRICE_MODELS:
+        return PriceEngine(df, model=kind, seed=Config.get_seed(), sequence_start=Config.get_sequence_start())
+    raise ValueError(f"Unsupported generator: {kind}")
 
-def simulate_trades(throughput: int, mode: str, batch_size: int, num_threads: int):
+def build_generator(tickers: Optional[Collection[str]] = None) -> BlockGenerator:
+    """The GENERATOR for a simulation run; "replay" streams the CSV instead of loading it."""
+    if Config.get_generator() == "replay":
+        return ReplayGenerator(
+            Config.get_local_csv_path(),
+            speed=Config.get_replay_speed(),
+            chunk_size=Config.get_replay_chunk_size(),
+            tickers=tickers,
+            loop=Config.get_replay_loop(),
+        )
     df = load_data()
+    if tickers is not None:
+        df = df[df["ticker"].isin(tickers)].reset_index(drop=True)
+    return make_generator(df)
+
+def simulate_trades(
+    throughput: int,
+    mode: str,
+    batch_size: int,
+    num_threads: int,
+    tickers: Optional[Collection[str]] = None,
+    stop_event=None,
+    report: Optional[Callable[[dict], None]] = None,
+):
+    """
+    Generate and send trades until interrupted or stop_event is set.
+
+    Replay (GENERATOR=replay) sends trades when their rewritten timestamps are due and
+    stops at the end of the file; THROUGHPUT still caps its rate.
+    tickers restricts generation to a subset of the source data, and report receives
+    the pipeline stats every LOG_INTERVAL seconds and once at the end; both are used
+    by the multi-process runner in tradeSimulator.sharding.
+    """
+    generator = build_generator(tickers)
     producer = get_producer(mode)
-    total_trades = 0
-    rate_limiter = RateLimiter(throughput)
+    if mode == "async":
+        # one event loop with many inserts in flight instead of a thread per insert
+        try:
+            asyncio.run(run_async_simulation(
+                generator.next_batch, producer, throughput, batch_size, Config.get_async_concurrency(),
+                stop_event=stop_event, report=report,
+                pacing_delay=generator.pacing_delay if generator.paced else None,
+            ))
+        except KeyboardInterrupt:
+            logger.info("Stopping simulation due to keyboard interrupt.")
+        return
+    if mode == "db" and Config.get_db_pool_size() < num_threads:
+        logger.warning(f"DB_POOL_SIZE={Config.get_db_pool_size()} is below num_threads={num_threads}; "
+                       "workers will wait for connections.")
+    # throughput is trades per second, not batches per second
+    rate_limiter = TokenBucket(throughput, burst=Config.get_burst() or batch_size)
+    pipeline = BatchPipeline(
+        producer.produce_batch,
+        num_workers=num_threads,
+        max_queue=Config.get_queue_size() or num_threads * 4,
+        policy=Config.get_backpressure_policy(),
+    )
     last_log_time = time.time()
 
-    def send_batch(batch_trades):
-        producer.produce_batch(batch_trades)
-        return len(batch_trades)
+    def report_stats():
+        stats = pipeline.stats()
+        stats["achieved_rate"] = rate_limiter.achieved_rate()
+        if report:
+            report(stats)
+        return stats
 
     try:
-        with ThreadPoolExecutor(max_workers=num_threads) as executor:
-            futures = []
-            while True:
-                batch = df.sample(n=batch_size, replace=True)
-                current_dt = datetime.now()
-                current_ts_str = current_dt.strftime("%Y-%m-%d %H:%M:%S")
-                current_date_str = current_dt.strftime("%Y-%m-%d")
-                current_ts_ns = int(current_dt.timestamp() * 1_000_000_000)
-
-                batch['localTS'] = current_ts_str
-                batch['localDate'] = current_date_str
-                batch['participant_timestamp'] = current_ts_ns
-                batch['sip_timestamp'] = current_ts_ns
-                batch['trf_timestamp'] = current_ts_ns
-
-                trades_list = batch.to_dict(orient='records')
+        while stop_event is None or not stop_event.is_set():
+            trades_list = generator.next_batch(batch_size)
+            if not trades_list:
+                logger.info("Reached the end of the source data.")
+                break
+            TRADES_GENERATED.inc(len(trades_list))
+            if generator.paced:
+                delay = generator.pacing_delay()
+                if delay > 0:
+                    if stop_event is not None:
+                        stop_event.wait(delay)
+                    else:
+                        time.sleep(delay)
 
-                with rate_limiter:
-                    future = executor.submit(send_batch, trades_list)
-                    futures.append(future)
+            RATE_LIMIT_WAIT_SECONDS.observe(rate_limiter.acquire(len(trades_list)))
+            pipeline.submit(trades_list)
 
-                now = time.time()
-                if now - last_log_time > Config.get_log_interval():
-                    logger.info(f"Sent {total_trades} trades so far at ~{throughput} trades per second.")
-                    last_log_time = now
-
-                done_futures = [f for f in futures if f.done()]
-                for f in done_futures:
-                    res = f.result()
-                    total_trades += res
-                    futures.remove(f)
+            now = time.time()
+            if now - last_log_time > Config.get_log_interval():
+                stats = report_stats()
+                logger.info(f"Generated {TRADES_GENERATED.value} and sent {stats['completed']} trades so far at "
+                            f"{stats['achieved_rate']:.0f} trades per second (target {throughput}); queue depth "
+                            f"{stats['queue_depth']}/{stats['max_queue']}, dropped {stats['dropped']} trades.")
+                last_log_time = now
     except KeyboardInterrupt:
         logger.info("Stopping simulation due to keyboard interrupt.")
     finally:
+        pipeline.close()
         producer.close()
-        logger.info(f"Simulation ended. Total trades sent: {total_trades}")
+        logger.info(f"Simulation ended. Total trades sent: {report_stats()['completed']}")
 
 def main():
     setup_logging()
     logger.info("Starting trade simulation...")
-    simulate_trades(
-        throughput=10,
-        mode="db",
-        batch_size=10,
-        num_threads=Config.get_num_threads()
-    )
+    start_exporters()
+    num_processes = Config.get_num_processes()
+    if num_processes > 1 and multiprocessing.current_process().daemon:
+        # e.g. the simulator started from the Streamlit app: daemon processes cannot fork workers
+        logger.warning(f"NUM_PROCESSES={num_processes} ignored in a daemon process; running a single process.")
+        num_processes = 1
+    # one pruner per run, not per worker process
+    retention = start_retention() if Config.get_mode() in ("db", "async") else None
+    try:
+        if num_processes > 1:
+            from tradeSimulator.sharding import run_sharded
+            run_sharded(
+                num_processes=num_processes,
+                throughput=Config.get_throughput(),
+                mode=Config.get_mode(),
+                batch_size=Config.get_batch_size(),
+                num_threads=Config.get_num_threads()
+            )
+        else:
+            simulate_trades(
+                throughput=Config.get_throughput(),
+                mode=Config.get_mode(),
+                batch_size=Config.get_batch_size(),
+                num_threads=Config.get_num_threads()
+            )
+    finally:
+        if retention:
+            retention.close()
     logger.info("Trade simulation completed.")
 
 if __name__ == '__main__':
@@ -0,0 +1,243 @@
+import logging
+import os
+import pickle
+import re
+import struct
+import threading
+import zlib
+from typing import Callable, Iterator, List, Optional, Tuple
+from tradeSimulator.metrics import REGISTRY
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory lock on the spool directory
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SPOOL_TRADES_WRITTEN = REGISTRY.counter("spool_trades_written_total", "Trades appended to the spool")
+SPOOL_TRADES_DRAINED = REGISTRY.counter("spool_trades_drained_total", "Spooled trades committed to the database")
+SPOOL_DRAIN_FAILURES = REGISTRY.counter("spool_drain_failures_total", "Drain attempts that failed and will be retried")
+SPOOL_PENDING_BYTES = REGISTRY.gauge("spool_pending_bytes", "Bytes of spooled segments not yet drained")
+
+# record header: payload length and CRC-32 of the payload
+HEADER = struct.Struct("<II")
+SEGMENT_PATTERN = re.compile(r"^segment-(\d{12})\.log$")
+CHECKPOINT_FILE = "checkpoint"
+
+def segment_name(seq: int) -> str:
+    return f"segment-{seq:012d}.log"
+
+def read_records(path: str, offset: int, end: Optional[int] = None) -> Iterator[Tuple[int, List[Tuple]]]:
+    """
+    Yield (end_offset, rows) for each complete record in path from offset.
+
+    Stops at end, or at the first truncated or corrupt record: a crash can leave a
+    partial record at the tail of a segment, and nothing after it was acknowledged.
+    """
+    with open(path, "rb") as f:
+        f.seek(offset)
+        while end is None or offset < end:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                return
+            length, crc = HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                logger.warning(f"Ignoring truncated or corrupt record at {path}:{offset}.")
+                return
+            offset += HEADER.size + length
+            yield offset, pickle.loads(payload)
+
+class Spool:
+    """
+    Disk-backed write-ahead spool between batch generation and the database.
+
+    append() writes each batch as one length-prefixed, checksummed record to the
+    active segment file and returns; it never waits for the database. Segments
+    rotate at segment_bytes. A drainer thread reads records in order, sends them to
+    `send` in batches of about drain_batch trades, and after each successful send
+    records the position in a checkpoint file; fully drained segments are deleted.
+    When send fails the same rows are retried with exponential backoff.
+
+    Delivery is at least once: after a crash the drainer resumes from the last
+    checkpoint, so the batch in flight may be sent again. send should therefore skip
+    duplicates (DBHandler with ignore_duplicates=True, keyed on the table's unique key).
+    Segments left by an earlier run are drained before new ones.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        send: Callable[[List[Tuple]], None],
+        segment_bytes: int = 64 * 1024 * 1024,
+        drain_batch: int = 50_000,
+        fsync: bool = False,
+        max_backoff: float = 30.0,
+    ):
+        self.directory = directory
+        self.send = send
+        self.segment_bytes = segment_bytes
+        self.drain_batch = drain_batch
+        self.fsync = fsync
+        self.max_backoff = max_backoff
+        os.makedirs(directory, exist_ok=True)
+        self._lock_file = open(os.path.join(directory, "lock"), "w")
+        if fcntl is not None:
+            try:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                raise RuntimeError(f"Spool directory {directory} is in use by another process")
+
+        self._lock = threading.Lock()
+        self._data_ready = threading.Condition(self._lock)
+        self._closing = False
+        self._stop = threading.Event()
+        existing = self._segments()
+        self._read_seq, self._read_offset = self._load_checkpoint(existing)
+        if self._read_seq not in existing:
+            self._read_offset = 0
+        for seq in existing:
+            if seq < self._read_seq:
+                os.remove(self._path(seq))
+        self._pending_bytes = sum(os.path.getsize(self._path(seq)) for seq in existing if seq >= self._read_seq)
+        self._pending_bytes -= self._read_offset if self._read_seq in existing else 0
+        SPOOL_PENDING_BYTES.set_function(lambda: self._pending_bytes)
+        if self._pending_bytes > 0:
+            logger.info(f"Recovering {self._pending_bytes} spooled bytes from {directory}.")
+        # new data always goes to a fresh segment; an old one may end in a torn record
+        self._write_seq = max(existing + [self._read_seq]) + 1
+        self._file = open(self._path(self._write_seq), "ab")
+        self._write_offset = 0
+        self._drainer = threading.Thread(target=self._drain_loop, name="spool-drainer", daemon=True)
+        self._drainer.start()
+
+    def _path(self, seq: int) -> str:
+        return os.path.join(self.directory, segment_name(seq))
+
+    def _segments(self) -> List[int]:
+        return sorted(
+            int(match.group(1)) for match in map(SEGMENT_PATTERN.match, os.listdir(self.directory)) if match
+        )
+
+    def _load_checkpoint(self, existing: List[int]) -> Tuple[int, int]:
+        try:
+            with open(os.path.join(self.directory, CHECKPOINT_FILE)) as f:
+                seq, offset = f.read().split()
+                return int(seq), int(offset)
+        except (OSError, ValueError):
+            return (existing[0] if existing else 0), 0
+
+    def _save_checkpoint(self, seq: int, offset: int):
+        path = os.path.join(self.directory, CHECKPOINT_FILE)
+        with open(f"{path}.tmp", "w") as f:
+            f.write(f"{seq} {offset}")
+        os.replace(f"{path}.tmp", path)
+
+    def append(self, trades: List[Tuple]):
+        """Durably queue a batch for the database."""
+        if not trades:
+            return
+        payload = pickle.dumps(trades, protocol=pickle.HIGHEST_PROTOCOL)
+        record = HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+        with self._lock:
+            if self._closing:
+                raise RuntimeError("Spool is closed")
+            if self._write_offset and self._write_offset + len(record) > self.segment_bytes:
+                self._file.close()
+                self._write_seq += 1
+                self._file = open(self._path(self._write_seq), "ab")
+                self._write_offset = 0
+            self._file.write(record)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self._write_offset += len(record)
+            self._pending_bytes += len(record)
+            self._data_ready.notify()
+        SPOOL_TRADES_WRITTEN.inc(len(trades))
+
+    def _next_rows(self) -> Tuple[List[Tuple], int, int]:
+        """Up to about drain_batch rows from the read position, with the position after them."""
+        rows: List[Tuple] = []
+        seq, offset = self._read_seq, self._read_offset
+        while len(rows) < self.drain_batch:
+            with self._lock:
+                write_seq, write_offset = self._write_seq, self._write_offset
+            # the active segment is read up to the last complete append, sealed ones to the end
+            end = write_offset if seq == write_seq else None
+            path = self._path(seq)
+            if os.path.exists(path):
+                for offset, records in read_records(path, offset, end):
+                    rows.extend(records)
+                    if len(rows) >= self.drain_batch:
+                        return rows, seq, offset
+            if seq >= write_seq:
+                break
+            seq, offset = seq + 1, 0
+        return rows, seq, offset
+
+    def _advance(self, seq: int, offset: int):
+        drained = 0
+        for old in range(self._read_seq, seq):
+            path = self._path(old)
+            if os.path.exists(path):
+                drained += os.path.getsize(path) - (self._read_offset if old == self._read_seq else 0)
+                os.remove(path)
+        drained += offset - (self._read_offset if seq == self._read_seq else 0)
+        self._save_checkpoint(seq, offset)
+        with self._lock:
+            self._read_seq, self._read_offset = seq, offset
+            self._pending_bytes -= drained
+
+    def _drain_loop(self):
+        backoff = 1.0
+        while not self._stop.is_set():
+            with self._lock:
+                while self._pending_bytes <= 0 and not self._closing:
+                    self._data_ready.wait()
+                if self._pending_bytes <= 0:
+                    return
+            rows, seq, offset = self._next_rows()
+            if not rows:
+                if (seq, offset) != (self._read_seq, self._read_offset):
+                    # skipped empty segments or a torn tail
+                    self._advance(seq, offset)
+                elif self._closing:
+                    return
+                else:
+                    self._stop.wait(0.05)
+                continue
+            try:
+                self.send(rows)
+            except Exception as e:
+                SPOOL_DRAIN_FAILURES.inc()
+                logger.warning(f"Draining {len(rows)} spooled trades failed, retrying in {backoff:.1f}s: {e}")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+                continue
+            backoff = 1.0
+            self._advance(seq, offset)
+            SPOOL_TRADES_DRAINED.inc(len(rows))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"pending_bytes": self._pending_bytes, "segment": self._write_seq}
+
+    def close(self, timeout: float = 30.0):
+        """
+        Stop accepting batches and drain for up to timeout seconds.
+
+        Anything not drained by then stays on disk and is sent by the next run.
+        """
+        with self._lock:
+            self._closing = True
+            self._file.close()
+            self._data_ready.notify()
+        self._drainer.join(timeout)
+        if self._drainer.is_alive():
+            self._stop.set()
+            self._drainer.join()
+        if self._pending_bytes > 0:
+            logger.warning(f"{self._pending_bytes} spooled bytes left in {self.directory} for the next run.")
+        self._lock_file.close()
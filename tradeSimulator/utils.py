@@ -1,16 +1,80 @@
+import asyncio
+import multiprocessing
+import threading
 import time
+from typing import Optional
 
-class RateLimiter:
-    def __init__(self, rate_per_second: int):
-        self.rate_per_second = rate_per_second
-        self.interval = 1.0 / rate_per_second
-        self.next_execution_time = time.monotonic()
+# Canonical column order of the trade source data and the live_trades table.
+TRADE_COLUMNS = [
+    "localTS", "localDate", "ticker", "conditions", "correction", "exchange",
+    "id", "participant_timestamp", "price", "sequence_number", "sip_timestamp",
+    "size", "tape", "trf_id", "trf_timestamp"
+]
 
-    def __enter__(self):
-        current_time = time.monotonic()
-        if current_time < self.next_execution_time:
-            time.sleep(self.next_execution_time - current_time)
-        self.next_execution_time += self.interval
+# Columns rewritten with the current time for every simulated batch.
+TIMESTAMP_COLUMNS = ["localTS", "localDate", "participant_timestamp", "sip_timestamp", "trf_timestamp"]
 
-    def __exit__(self, exc_type, exc_value, traceback):
-        pass
+# Column order of generated row tuples: source columns first, timestamps last, so a
+# batch is built by appending one shared timestamp tuple to pre-built source rows.
+ROW_COLUMNS = [col for col in TRADE_COLUMNS if col not in TIMESTAMP_COLUMNS] + TIMESTAMP_COLUMNS
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter counted in trades.
+
+    Tokens refill continuously at rate_per_second up to burst. acquire(n) takes n tokens
+    and sleeps only for the deficit, so a batch larger than burst is admitted by going
+    into debt that later callers pay off. This keeps the long-run rate exact instead of
+    drifting when the caller falls behind. All state sits behind one lock; with
+    shared=True it lives in shared memory so forked processes can share one bucket.
+    """
+
+    def __init__(self, rate_per_second: float, burst: Optional[float] = None, shared: bool = False):
+        if rate_per_second <= 0:
+            raise ValueError("rate_per_second must be positive")
+        self.rate_per_second = float(rate_per_second)
+        self.burst = float(burst) if burst else self.rate_per_second
+        now = time.monotonic()
+        # tokens, last refill time, trades admitted, start time
+        initial = [self.burst, now, 0.0, now]
+        if shared:
+            self._state = multiprocessing.Array("d", initial)
+            self._lock = self._state.get_lock()
+        else:
+            self._state = initial
+            self._lock = threading.Lock()
+
+    def _reserve(self, trades: int) -> float:
+        """Take `trades` tokens and return how long the caller must wait before sending."""
+        with self._lock:
+            now = time.monotonic()
+            tokens = min(self.burst, self._state[0] + (now - self._state[1]) * self.rate_per_second)
+            tokens -= trades
+            self._state[0] = tokens
+            self._state[1] = now
+            self._state[2] += trades
+        return -tokens / self.rate_per_second if tokens < 0 else 0.0
+
+    def acquire(self, trades: int = 1) -> float:
+        """Block until `trades` may be sent. Returns the time slept in seconds."""
+        wait = self._reserve(trades)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, trades: int = 1) -> float:
+        """Like acquire(), but yields to the event loop instead of sleeping the thread."""
+        wait = self._reserve(trades)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def achieved_rate(self) -> float:
+        """Trades admitted per second since the bucket was created."""
+        with self._lock:
+            admitted, start = self._state[2], self._state[3]
+        elapsed = time.monotonic() - start
+        return admitted / elapsed if elapsed > 0 else 0.0
+
+    def stats(self) -> dict:
+        return {"target_rate": self.rate_per_second, "achieved_rate": self.achieved_rate()}